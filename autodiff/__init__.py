@@ -1,6 +1,10 @@
 from .node import *
 from .operators import *
 from .visualization import *
+from .tape import *
+from .profiling import *
+from .derivatives import *
+from .dual import Dual
 from .settings import settings
 
 name = "autodiff_jel"
@@ -0,0 +1,153 @@
+"""
+Derivative APIs built on compiled tapes
+
+Functions for differentiating several outputs at once, which share
+one evaluation of their common subgraphs, and for second derivatives.
+"""
+
+import numpy as np
+from .tape import Tape, forward_seeds, tangent_block, reduce_to_shape
+from .dual import Dual, split
+
+def jacobian(outputs, inputs, mode=None):
+	""" Jacobian of one or several output nodes.
+
+	Inputs:
+	-outputs: a node or a list of nodes, possibly sharing subgraphs
+	-inputs: dictionary of {variable_name: value, ...}
+	-mode: "forward", "reverse", or None to pick the cheaper one
+
+	Returns an array of shape (n_outputs, n_inputs), where outputs
+	and inputs are flattened elementwise and concatenated in the
+	order given. Forward mode costs one vectorized sweep with a
+	row per input, reverse mode one sweep per output element, so
+	None picks forward when there are no more inputs than outputs.
+	"""
+	if not isinstance(outputs, (list, tuple)):
+		outputs = [outputs]
+	tape = Tape(outputs)
+
+	variables = {}
+	for output in outputs:
+		variables.update(output._variables)
+	if inputs.keys() != variables.keys():
+		raise TypeError('Input not recognized.')
+
+	values = tape.evaluate(inputs)
+	out_sizes = [np.size(values[slot]) for slot in tape.outputs]
+	in_sizes = [np.size(value) for value in inputs.values()]
+
+	if mode is None:
+		mode = "forward" if sum(in_sizes) <= sum(out_sizes) else "reverse"
+	if mode == "forward":
+		rows = forward_jacobian(tape, values, inputs)
+	elif mode == "reverse":
+		rows = reverse_jacobian(tape, values, inputs)
+	else:
+		raise ValueError("Mode must be either \"forward\" or \"reverse\"")
+
+	return np.reshape(np.concatenate(rows), (sum(out_sizes), sum(in_sizes)))
+
+def forward_jacobian(tape, values, inputs):
+	""" Jacobian rows of every output from one vectorized tangent sweep. """
+	ndim = max(np.ndim(value) for value in values)
+	seeds, seed_rows = forward_seeds(inputs, ndim)
+	tangents = tape.tangent(values, seeds)
+
+	rows = []
+	for slot in tape.outputs:
+		size = np.size(values[slot])
+		blocks = [np.reshape(tangent_block(tangents[slot], seed_rows[name], value, values[slot], ndim),
+							 (np.size(value), size))
+				  for name, value in inputs.items()]
+		rows.append(np.concatenate(blocks).T)
+	return rows
+
+def reverse_jacobian(tape, values, inputs):
+	""" Jacobian rows of every output, one adjoint sweep per output element. """
+	rows = []
+	for slot in tape.outputs:
+		value = values[slot]
+		for idx in range(np.size(value)):
+			seed = np.zeros(np.size(value))
+			seed[idx] = 1
+			grads = tape.adjoint(values, {slot: np.reshape(seed, np.shape(value))})
+
+			row = []
+			for name, input_value in inputs.items():
+				grad = np.zeros(np.shape(input_value))
+				for var_slot in tape.variables.get(name, []):
+					if grads[var_slot] is not None:
+						grad = grad + reduce_to_shape(grads[var_slot], np.shape(input_value))
+				row.append(np.ravel(grad))
+			rows.append(np.concatenate(row))
+	return rows
+
+def hvp(output, inputs, vector):
+	""" Hessian-vector product of an output node.
+
+	Inputs:
+	-output: a node; a vector output is treated as the sum of its elements
+	-inputs: dictionary of {variable_name: value, ...}
+	-vector: direction, flattened over the inputs in the order given
+
+	Computed forward-over-reverse: the variables carry the direction
+	as dual tangents through the eval and reverse sweeps, so the
+	gradient comes out with its directional derivative H v, at a
+	small constant multiple of the cost of one gradient.
+	"""
+	vector = np.ravel(vector)
+	sizes = [np.size(value) for value in inputs.values()]
+	if vector.size != sum(sizes):
+		raise ValueError('Vector must have one entry per input element.')
+
+	offsets = np.cumsum([0] + sizes)
+	directions = {name: np.reshape(vector[start:stop], np.shape(value))
+				  for (name, value), start, stop in zip(inputs.items(), offsets[:-1], offsets[1:])}
+	shapes = {name: np.shape(value) for name, value in inputs.items()}
+	tangents = dual_gradient(output, inputs, directions, shapes)
+	return np.concatenate([np.ravel(tangents[name]) for name in inputs])
+
+def hessian(output, inputs):
+	""" Dense Hessian of an output node, of shape (n_inputs, n_inputs).
+
+	Runs a single forward-over-reverse sweep in which the tangents
+	carry every input direction at once, as in forward mode. Meant
+	for small problems; use hvp otherwise.
+	"""
+	if inputs.keys() != output._variables.keys():
+		raise TypeError('Input not recognized.')
+	tape = output.compile()
+	ndim = max(np.ndim(value) for value in tape.evaluate(inputs))
+	seeds, rows = forward_seeds(inputs, ndim)
+	total = sum(np.size(value) for value in inputs.values())
+	shapes = {name: (total,) + (1,) * (ndim - np.ndim(value)) + np.shape(value)
+			  for name, value in inputs.items()}
+	tangents = dual_gradient(output, inputs, seeds, shapes)
+	return np.concatenate([np.reshape(tangents[name], (total, -1)) for name in inputs], axis=1)
+
+def dual_gradient(output, inputs, directions, shapes):
+	""" Tangents of the gradient when the inputs carry the given directions.
+
+	The adjoint reaching each variable is summed over broadcast axes
+	down to the given tangent shape.
+	"""
+	tape = output.compile()
+	if len(tape.outputs) > 1:
+		raise TypeError('Tape has several outputs, use one output node.')
+	if inputs.keys() != output._variables.keys():
+		raise TypeError('Input not recognized.')
+
+	values = tape.evaluate({name: Dual(value, directions[name]) for name, value in inputs.items()})
+	seed = np.ones(np.shape(split(values[-1])[0]))
+	grads = tape.adjoint(values, {len(tape) - 1: seed})
+
+	tangents = {}
+	for name in inputs:
+		tangent = np.zeros(shapes[name])
+		for slot in tape.variables.get(name, []):
+			grad_tangent = split(grads[slot])[1]
+			if grad_tangent is not None:
+				tangent = tangent + reduce_to_shape(grad_tangent, shapes[name])
+		tangents[name] = tangent
+	return tangents
@@ -0,0 +1,179 @@
+"""
+Dual Numbers for Automatic Differentiation
+
+A dual number carries a value together with its tangent, and every
+operation on it updates both at once, so scalar functions can be
+differentiated in forward mode without building a graph. The
+elementary functions in operators accept duals directly.
+
+Duals also implement the NumPy ufunc protocol, so the computation
+functions used by the operator nodes run on them unchanged; running
+a reverse sweep on dual values differentiates the gradient itself
+(forward-over-reverse).
+"""
+
+import numpy as np
+
+def split(x):
+	""" Value and tangent of x, with None as the tangent of a plain number. """
+	if isinstance(x, Dual):
+		return x._value, x._derivative
+	return x, None
+
+def scale(tangent, factor):
+	""" factor * tangent, where a None tangent stays None. """
+	if tangent is None:
+		return None
+	return factor * tangent
+
+def combine(*tangents):
+	""" Sum of the tangents that are not None. """
+	total = None
+	for tangent in tangents:
+		if tangent is not None:
+			total = tangent if total is None else total + tangent
+	return total
+
+def unary_rule(derivative):
+	""" Rule for f(x) given f'(x) in terms of x and the value f(x). """
+	def rule(ufunc, x, t):
+		value = ufunc(x)
+		return value, scale(t, derivative(x, value))
+	return rule
+
+def power_rule(ufunc, x, t_x, y, t_y):
+	value = np.power(x, y)
+	tangent = scale(t_x, np.multiply(y, np.power(x, np.subtract(y, 1))))
+	if t_y is not None:
+		# Only a varying exponent needs log(x)
+		tangent = combine(tangent, scale(t_y, np.multiply(np.log(x), value)))
+	return value, tangent
+
+def divide_rule(ufunc, x, t_x, y, t_y):
+	value = np.divide(x, y)
+	return value, combine(scale(t_x, np.divide(1, y)), scale(t_y, np.negative(np.divide(value, y))))
+
+# Derivative rules by ufunc, all elementwise
+RULES = {
+	np.add: lambda ufunc, x, t_x, y, t_y: (np.add(x, y), combine(t_x, t_y)),
+	np.subtract: lambda ufunc, x, t_x, y, t_y: (np.subtract(x, y), combine(t_x, scale(t_y, -1))),
+	np.multiply: lambda ufunc, x, t_x, y, t_y: (np.multiply(x, y), combine(scale(t_x, y), scale(t_y, x))),
+	np.divide: divide_rule,
+	np.power: power_rule,
+	np.negative: unary_rule(lambda x, value: -1),
+	np.exp: unary_rule(lambda x, value: value),
+	np.log: unary_rule(lambda x, value: np.divide(1, x)),
+	np.sqrt: unary_rule(lambda x, value: np.divide(0.5, value)),
+	np.square: unary_rule(lambda x, value: np.multiply(2, x)),
+	np.sin: unary_rule(lambda x, value: np.cos(x)),
+	np.cos: unary_rule(lambda x, value: np.negative(np.sin(x))),
+	np.tan: unary_rule(lambda x, value: np.add(1, np.square(value))),
+	np.arcsin: unary_rule(lambda x, value: np.divide(1, np.sqrt(np.subtract(1, np.square(x))))),
+	np.arccos: unary_rule(lambda x, value: np.divide(-1, np.sqrt(np.subtract(1, np.square(x))))),
+	np.arctan: unary_rule(lambda x, value: np.divide(1, np.add(1, np.square(x)))),
+	np.sinh: unary_rule(lambda x, value: np.cosh(x)),
+	np.cosh: unary_rule(lambda x, value: np.sinh(x)),
+	np.tanh: unary_rule(lambda x, value: np.subtract(1, np.square(value))),
+}
+
+# Comparisons only look at values
+COMPARISONS = {np.equal, np.not_equal, np.less, np.less_equal, np.greater, np.greater_equal}
+
+class Dual():
+	""" Class Dual
+
+	A value and its tangent. The tangent has the shape of the value,
+	optionally with leading axes for carrying several directions.
+	Seed an input with a tangent of 1, e.g. f(Dual(2.0, 1)), to get
+	f(2.0) and f'(2.0) from one evaluation.
+	"""
+
+	__slots__ = ('_value', '_derivative')
+
+	def __init__(self, value, derivative=None):
+		self._value = value
+		self._derivative = derivative
+
+	def value(self):
+		return self._value
+
+	def derivative(self):
+		""" Tangent of the value, zero for a constant. """
+		if self._derivative is None:
+			return np.zeros_like(self._value)
+		return self._derivative
+
+	def __repr__(self):
+		return 'Dual(Value = %r, Derivative = %r)' % (self._value, self.derivative())
+
+	def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+		if method != '__call__' or kwargs:
+			return NotImplemented
+		if ufunc in COMPARISONS:
+			return ufunc(*[split(x)[0] for x in inputs])
+		rule = RULES.get(ufunc)
+		if rule is None:
+			return NotImplemented
+		args = []
+		for x in inputs:
+			args.extend(split(x))
+		value, tangent = rule(ufunc, *args)
+		return Dual(value, tangent)
+
+	def round(self, decimals=0, out=None):
+		""" Rounded value, so np.round can be used in checks. """
+		return np.round(self._value, decimals)
+
+	""" MAGIC
+
+	Arithmetic is written out directly rather than going through
+	the ufunc protocol, since it is the hot path for scalars.
+	"""
+
+	def __add__(self, other):
+		if isinstance(other, Dual):
+			return Dual(self._value + other._value, combine(self._derivative, other._derivative))
+		return Dual(self._value + other, self._derivative)
+
+	def __radd__(self, other):
+		return Dual(other + self._value, self._derivative)
+
+	def __sub__(self, other):
+		if isinstance(other, Dual):
+			return Dual(self._value - other._value, combine(self._derivative, scale(other._derivative, -1)))
+		return Dual(self._value - other, self._derivative)
+
+	def __rsub__(self, other):
+		return Dual(other - self._value, scale(self._derivative, -1))
+
+	def __mul__(self, other):
+		if isinstance(other, Dual):
+			return Dual(self._value * other._value,
+						combine(scale(self._derivative, other._value), scale(other._derivative, self._value)))
+		return Dual(self._value * other, scale(self._derivative, other))
+
+	def __rmul__(self, other):
+		return Dual(other * self._value, scale(self._derivative, other))
+
+	def __truediv__(self, other):
+		if isinstance(other, Dual):
+			return np.divide(self, other)
+		return Dual(self._value / other, scale(self._derivative, 1 / other))
+
+	def __rtruediv__(self, other):
+		value = other / self._value
+		return Dual(value, scale(self._derivative, -value / self._value))
+
+	def __pow__(self, other):
+		if isinstance(other, Dual):
+			return np.power(self, other)
+		return Dual(self._value ** other, scale(self._derivative, other * self._value ** (other - 1)))
+
+	def __rpow__(self, other):
+		return np.power(other, self)
+
+	def __neg__(self):
+		return Dual(-self._value, scale(self._derivative, -1))
+
+	def __pos__(self):
+		return self
@@ -3,10 +3,15 @@ Node Logic for Automatic Differentiation
 """
 
 from functools import wraps
+import itertools
+import threading
+import weakref
 import numpy as np
 import numbers
 from .visualization import create_computational_graph, create_computational_table
+from .tape import Tape, forward_seeds, tangent_derivative
 from .settings import settings
+from .dual import Dual, split
 
 """
 Custom exceptions. 
@@ -14,6 +19,31 @@ Custom exceptions.
 class NoValueError(Exception):
 	pass
 
+# Variables of nodes that depend on none, shared by all of them
+NO_VARIABLES = {}
+
+def positive_log(value):
+	""" Log of the positive entries of value, 0 elsewhere.
+
+	A Dual keeps its tangent, 0 where the value is not positive.
+	"""
+	value, tangent = split(value)
+	positive = np.greater(value, 0)
+	safe = np.where(positive, value, 1)
+	result = np.where(positive, np.log(safe), 0)
+	if tangent is None:
+		return result
+	return Dual(result, np.where(positive, np.divide(tangent, safe), 0))
+
+def is_constant(node, value):
+	""" Whether a node is a scalar Constant equal to value. """
+	return isinstance(node, Constant) and np.ndim(node.value()) == 0 and node.value() == value
+
+class ComputeState(threading.local):
+	""" Memoization stamps of the running Node.compute, per thread. """
+	epoch = None
+	sweep = None
+
 class node_decorate():
 		""" Decorator for computation functions.
 
@@ -32,18 +62,25 @@ class node_decorate():
 							'differentiate': self.diff_wrapper,
 							'reverse': self.reverse_wrapper}
 			self.wrapper = self.factory[mode]
+			self.mode = mode
 
 		def __call__(self, fn):
-
-			return self.wrapper(fn)
+			wrapper = self.wrapper(fn)
+			# Marks the wrapper for profiling.profile to instrument
+			wrapper.node_mode = self.mode
+			return wrapper
 
 		def eval_wrapper(self, fn):
 			""" Wrapper for updating node values. """
 			@wraps(fn)
 			def wrapper(self):
+				# Already evaluated in this compute, reuse the value
+				if Node._state.epoch is not None and self._eval_stamp == Node._state.epoch:
+					return self._value
 				values = [child.eval() for child in self.children]
 				result = fn(self, values)
 				self.set_value(result)
+				self._eval_stamp = Node._state.epoch
 				return result
 			return wrapper
 
@@ -51,10 +88,17 @@ class node_decorate():
 			""" Wrapper for updating node derivatives. """
 			@wraps(fn)
 			def wrapper(self):
+				# Already differentiated in this sweep, reuse the tangent
+				if Node._state.sweep is not None and self._diff_stamp == Node._state.sweep:
+					return self._tangent
 				values = [child.eval() for child in self.children]
 				diffs = [child.diff() for child in self.children]
-				result = fn(self, values, diffs)
-				self.set_derivative(result)
+				if self.reuses_value:
+					result = fn(self, values, diffs, self.eval())
+				else:
+					result = fn(self, values, diffs)
+				self._tangent = result
+				self._diff_stamp = Node._state.sweep
 				return result
 			return wrapper
 
@@ -69,13 +113,16 @@ class node_decorate():
 				# We need to have done first sweep before reverse, assume values exist
 				values = [child.value() for child in self.children]
 				grad_value = self._grad_value
-				results = fn(self, values, grad_value)
+				if self.reuses_value:
+					results = fn(self, values, grad_value, self.value())
+				else:
+					results = fn(self, values, grad_value)
 
 				# Need to propagate results (functions need to return same # of results as children)
+				# Children are reversed by the caller, in reverse topological order
 
 				for idx in range(len(results)):
 					self.children[idx].add_grad_contribution(results[idx])
-					self.children[idx].reverse()
 
 				return results
 			return wrapper
@@ -86,24 +133,76 @@ class Node():
 	Base Node implementation.
 	"""
 
+	# Memoization stamps, only set while Node.compute runs. A node's
+	# cached value is current while its stamp matches the epoch of the
+	# running compute, and its cached tangent while its stamp matches
+	# the current forward sweep. Outside of compute every call
+	# recomputes, as before. Kept per thread, so computes of separate
+	# graphs in separate threads do not clear each other's stamps.
+	_state = ComputeState()
+	_stamps = itertools.count()
+
+	# Slotted layout: graphs hold many nodes, so no per-instance __dict__
+	__slots__ = ('_value', '_derivative', '_variables', 'children',
+				 '_grad_value', '_cur_grad_count', '_grad_count',
+				 '_eval_stamp', '_diff_stamp', '_tangent', '_tape', '__weakref__')
+
+	# Live operator nodes by (type, child identities), for interning.
+	# A node keeps its children alive, so the ids in its key stay valid
+	# for as long as the entry exists.
+	_interned = weakref.WeakValueDictionary()
+
+	# Live constants made from scalar literals, by type and value
+	_constants = weakref.WeakValueDictionary()
+
+	# Name of type of node
+	type = 'None'
+
+	# Whether diff and reverse also take the node's own value,
+	# as computed in the eval sweep
+	reuses_value = False
+
+	# Source templates for Tape.to_function. {0}, {1} are the child
+	# values, {value} the node's value and {grad} its adjoint. Adjoint
+	# templates give each child's contribution, None where it is zero.
+	# Without a template the raw kernel is called instead.
+	value_source = None
+	adjoint_source = None
+
 	def __init__(self):
 		self._value = None
 		self._derivative = {}
-		self._variables = {}
-		self._cur_var = None
-		self.children = []
-
-		# Name of type of node
-		self.type = 'None'
+		# Shared and read-only, update_variables replaces it
+		self._variables = NO_VARIABLES
+		self.children = ()
 
 		# Reverse mode
 		self._grad_value = 0
 		self._cur_grad_count = 0
 		self._grad_count = 0
 
+		# Memoization stamps and last tangent matrix
+		self._eval_stamp = None
+		self._diff_stamp = None
+		self._tangent = None
+
+		# Compiled tape, built on first use
+		self._tape = None
+
 	@classmethod
 	def make_constant(cls, value):
-		return Constant(value)
+		""" Wrap a literal in a Constant. Scalar literals share one
+		live Constant per value.
+		"""
+		if not isinstance(value, numbers.Number):
+			return Constant(value)
+		key = (type(value), value)
+		constant = cls._constants.get(key)
+		# Constants can be given a new value, only reuse unchanged ones
+		if constant is None or type(constant.value()) is not type(value) or constant.value() != value:
+			constant = Constant(value)
+			cls._constants[key] = constant
+		return constant
 
 	@classmethod
 	def make_node(cls, node, *values):
@@ -113,6 +212,19 @@ class Node():
 			if not isinstance(new, Node):
 				new = cls.make_constant(value)
 			new_nodes.append(new)
+
+		# Operations on constants only are folded into one constant
+		kernel = getattr(node.eval, '__wrapped__', None)
+		if kernel is not None and new_nodes and all(isinstance(child, Constant) for child in new_nodes):
+			return cls.make_constant(kernel(node, [child.value() for child in new_nodes]))
+
+		if settings.current_interning():
+			key = (type(node),) + tuple(id(child) for child in new_nodes)
+			existing = cls._interned.get(key)
+			if existing is not None:
+				return existing
+			cls._interned[key] = node
+
 		node.set_children(*new_nodes)
 		node.update_variables()
 		return node
@@ -169,11 +281,21 @@ class Node():
 		return node
 
 	def __pow__(self, value):
-		node = self.make_node(Power(), self, value)
+		# Constant exponents and bases have specialized nodes
+		exp = value if isinstance(value, Node) else self.make_constant(value)
+		if isinstance(self, Constant):
+			power = PowConstBase()
+		elif is_constant(exp, 2):
+			power = Square()
+		elif isinstance(exp, Constant):
+			power = PowConstExp()
+		else:
+			power = Power()
+		node = self.make_node(power, self, exp)
 		return node
 
 	def __rpow__(self, value):
-		node = self.make_node(Power(), value, self)
+		node = self.make_node(PowConstBase(), value, self)
 		return node
 
 	def __eq__(self,other):
@@ -185,6 +307,18 @@ class Node():
 	def __hash__(self):
 		return id(self)
 
+	def __getstate__(self):
+		""" Pickle without the cached tape, whose raw kernels cannot
+		be pickled. Slotted state is returned as pickle expects it.
+		"""
+		slots = {}
+		for cls in type(self).__mro__:
+			for name in getattr(cls, '__slots__', ()):
+				if name != '__weakref__' and hasattr(self, name):
+					slots[name] = getattr(self, name)
+		slots['_tape'] = None
+		return (getattr(self, '__dict__', None), slots)
+
 	""" ATTRIBUTES
 
 	Methods for setting and getting attributes.
@@ -202,13 +336,7 @@ class Node():
 		self._value = value
 
 	def set_derivative(self, value):
-		var = self.update_cur_var()
-		if isinstance(value, numbers.Number):
-			self._derivative[self._cur_var] = value
-		else:
-			# if self._cur_var not in self._derivative:
-			# 	self._derivative[self._cur_var] = np.zeros(value.size)
-			self._derivative[self._cur_var][var.var_idx] = value[var.var_idx]
+		self._derivative = value
 
 	def set_children(self, *children):
 		self.children = children
@@ -224,15 +352,17 @@ class Node():
 		necessary in children.
 		"""
 
-		new_vars = []
+		# Variable dicts are never mutated once built, so a node whose
+		# children add no new variables shares its child's dict
+		widest = max((child._variables for child in self.children), key=len, default=NO_VARIABLES)
+		variables = None
 		for child in self.children:
-			if isinstance(child, Variable):
-				new_vars.append(child)
-			else:
-				new_vars.extend(child._variables.values())
-		variables = list(set(new_vars))
-		variable_names = [var.name for var in variables]
-		self._variables = dict(zip(variable_names, variables))
+			for name, var in child._variables.items():
+				if name not in widest:
+					if variables is None:
+						variables = dict(widest)
+					variables[name] = var
+		self._variables = widest if variables is None else variables
 
 	def set_variables(self, input_dict):
 		""" Set variables for evaluation. """
@@ -240,44 +370,17 @@ class Node():
 		for key, value in input_dict.items():
 			self._variables[key].set_value(value)
 
-			# if isinstance(value, np.ndarray):
-			# 	self._derivative[key] = np.zeros(value.size)
-		self.zero_vector_derivative(input_dict)
-
-	def zero_vector_derivative(self, input_dict):
-		""" Reset vectors of derivatives recursively in children """
-		if type(self) != Variable:
-			for key, value in input_dict.items():
-				if isinstance(value, np.ndarray) and key in self._variables:
-					self._derivative[key] = np.zeros(value.size)
-
-			for node in self.children:
-				node.zero_vector_derivative(input_dict)
-
-	def update_cur_var(self):
-		for v in self._variables:
-			if np.any(self._variables[v].derivative()):
-				self._cur_var = v
-				return self._variables[v]
-
-	def iterate_seeds(self):
-		""" Generator to iterate over all variables of this
-		node, which assign seed values to variables to compute
-		all partials.
+	def seed_variables(self, ndim):
+		""" Seed every variable with its block of the tangent matrix,
+		so one forward sweep yields all partials. Returns the rows
+		of the tangent matrix belonging to each variable.
 		"""
+		inputs = {key: var.value() for key, var in self._variables.items()}
+		seeds, rows = forward_seeds(inputs, ndim)
+		for key, var in self._variables.items():
+			var.set_derivative(seeds[key])
+		return rows
 
-		for var in self._variables:
-			# Reset derivatives
-			for v in self._variables:
-				self._variables[v].set_derivative(0)
-
-			if isinstance(self._variables[var].value(), np.ndarray):
-				for idx in self._variables[var].iterate_idxs():
-					yield idx
-			else:
-				self._variables[var].set_derivative(1)
-			yield var
-	
 	""" REVERSE MODE
 
 	Helper functions for properly doing the reverse mode
@@ -288,18 +391,28 @@ class Node():
 
 	def zero_grad_values(self):
 		""" Reset all partial contributions for reverse pass """
-		self._grad_value = 0
-		self._cur_grad_count = 0
-		self._grad_count = 0
-
-		for child in self.children:
-			child.zero_grad_values()
+		for node in self.compile().nodes:
+			node._grad_value = 0
+			node._cur_grad_count = 0
+			node._grad_count = 0
 
 	def set_grad_count(self):
-		""" Calculate dependency counts """
+		""" Calculate dependency counts, one per parent edge.
+
+		The output itself counts the seed as its one dependency.
+		"""
+		for node in self.compile().nodes:
+			for child in node.children:
+				child._grad_count += 1
 		self._grad_count += 1
-		for child in self.children:
-			child.set_grad_count()
+
+	def reverse_sweep(self):
+		""" Propagate contributions from this node down to the
+		variables, visiting nodes in reverse topological order so
+		each is ready by the time it is reached.
+		"""
+		for node in reversed(self.compile().nodes):
+			node.reverse()
 
 	def ready_to_reverse(self):
 		return (self._cur_grad_count == self._grad_count)
@@ -322,6 +435,9 @@ class Node():
 		Inputs methods:
 		-Dictionary of {variable_name: value, ...}
 		-Keyword arguments of compute(variable_vame=value, ...)
+
+		Results are stored on the nodes, use run to evaluate one
+		graph from several threads.
 		"""
 		if len(args) == 0:
 			input_dict = kwargs
@@ -331,31 +447,83 @@ class Node():
 		if input_dict.keys() != self._variables.keys():
 			raise TypeError('Input not recognized.')
 
-		# Compute the value at this node
-		self.set_variables(input_dict)
-		self.eval()
-
-		# Compute derivatives based on mode
-
-		if settings.current_mode() == "forward":
-			for var in self.iterate_seeds():
-				self.diff()
-		else: 
-			# Reverse mode
-			self.zero_grad_values()
-			# Get proper contribution counts
-			self.set_grad_count()
-			# Seeding output, current node by 1
-			self.add_grad_contribution(1)
-			self.reverse()
-
-			# Now set the results
-			self._derivative = {}
-			for key, var in self._variables.items():
-				self._derivative[key] = var._grad_value
+		# Nodes in topological order; visiting them in this order with
+		# memoization keeps the wrappers from recursing more than a level
+		order = self.compile().nodes
+
+		# One epoch per compute: shared children are evaluated once
+		Node._state.epoch = next(Node._stamps)
+		try:
+			# Compute the value at this node
+			self.set_variables(input_dict)
+			for node in order:
+				node.eval()
+
+			# Compute derivatives based on mode
+
+			if settings.current_mode() == "forward":
+				# A single sweep carrying the tangents of all inputs
+				ndim = max(np.ndim(node.value()) for node in order)
+				rows = self.seed_variables(ndim)
+				Node._state.sweep = next(Node._stamps)
+				for node in order:
+					tangent = node.diff()
+					if not node.children:
+						continue
+					node.set_derivative({key: tangent_derivative(tangent, rows[key], var.value(), node.value(), ndim)
+										 for key, var in node._variables.items()})
+			else: 
+				# Reverse mode
+				self.zero_grad_values()
+				# Get proper contribution counts
+				self.set_grad_count()
+				# Seeding output, current node by 1
+				self.add_grad_contribution(1)
+				self.reverse_sweep()
+
+				# Now set the results
+				self._derivative = {}
+				for key, var in self._variables.items():
+					self._derivative[key] = var._grad_value
+		finally:
+			Node._state.epoch = None
+			Node._state.sweep = None
 
 		return self
 
+	def run(self, input_dict, mode=None):
+		""" Evaluate and differentiate without storing anything on
+		the graph, returning a new Evaluation.
+
+		Safe to call from several threads on one graph. The mode
+		defaults to the current mode from settings.
+		"""
+		return self.compile().run(input_dict, mode)
+
+	def compute_batch(self, input_dict):
+		""" Evaluate and differentiate at many points in one call.
+
+		Each input carries a leading batch axis. Returns the values
+		and the per-point derivatives, each with the batch axis first.
+		"""
+		return self.compile().compute_batch(input_dict)
+
+	def to_function(self):
+		""" Straight-line Python function returning the value and the
+		gradient of this node, cached on the compiled tape.
+		"""
+		return self.compile().to_function()
+
+	def compile(self):
+		""" Flatten the graph below this node into a Tape.
+
+		The tape is cached, since the children of a node
+		never change once it has been made.
+		"""
+		if self._tape is None:
+			self._tape = Tape(self)
+		return self._tape
+
 	# Uncomment when overriding:
 	# @node_decorate('evaluate')
 	def eval(self, values):
@@ -371,9 +539,45 @@ class Node():
 	def reverse(self, values, grad_value):
 		raise NotImplementedError
 
-	def get_comp_graph(self):
-		""" Creates a computational graph for a given node. """
-		return create_computational_graph(self)
+	""" SIMPLIFICATION
+
+	Algebraic rewrites applied to a graph before evaluation.
+	"""
+
+	def rewrite(self):
+		""" An equivalent, simpler node built from this node's
+		children, or None when no identity applies. Overridden
+		by subclasses.
+		"""
+		return None
+
+	def simplify(self):
+		""" Return an equivalent graph with identities such as x*1,
+		x+0, x**1, x*0, --x and exp(log(x)) rewritten away.
+
+		The original graph is left unchanged and shares its variables
+		with the result. Rewrites assume finite values: x*0 becomes
+		the constant 0, and variables that cancel out are no longer
+		inputs of the simplified graph.
+		"""
+		simplified = {}
+		for node in self.compile().nodes:
+			children = [simplified[id(child)] for child in node.children]
+			new = node
+			if any(new_child is not child for new_child, child in zip(children, node.children)):
+				new = self.make_node(type(node)(), *children)
+			rewritten = new.rewrite()
+			while rewritten is not None:
+				new = rewritten
+				rewritten = new.rewrite()
+			simplified[id(node)] = new
+		return simplified[id(self)]
+
+	def get_comp_graph(self, heatmap=None, profile=None):
+		""" Creates a computational graph for a given node,
+		optionally as a heatmap of a profiled compute.
+		"""
+		return create_computational_graph(self, heatmap, profile)
 
 	def get_comp_table(self):
 		""" Creates a computational table for a given node. """
@@ -393,14 +597,15 @@ class Variable(Node):
 	to the final output values.
 	"""
 
+	__slots__ = ('name',)
+	type = 'Variable'
+
 	def __init__(self, name=None):
 		super().__init__()
 		if name is None or not isinstance(name, str):
 			raise ValueError('Name must be given for variable.')
 		self.name = name
-		self.type = 'Variable'
-		self._variables[name] = self
-		self.var_idx = -1
+		self._variables = {name: self}
 
 	def eval(self):
 		if self.value() is None:
@@ -412,14 +617,6 @@ class Variable(Node):
 			raise NoValueError('Variable %s has been given no value.' % self.name)
 		return self.derivative()
 
-	# Override dict functionality for variables; I could keep this
-	# consistent, but would increase computation; elegance tradeoff
-	def set_derivative(self, value):
-		if isinstance(self.value(), np.ndarray):
-			self._derivative[:] = value
-		else:
-			self._derivative = value
-
 	# On value set, needs to set the derivative
 	def set_value(self, value):
 		self._value = None
@@ -427,14 +624,6 @@ class Variable(Node):
 			self.set_derivative(np.zeros(value.size))
 		super().set_value(value)
 
-	# Iterate over each vector position
-	def iterate_idxs(self):
-		for i in range(self._value.size):
-			self.set_derivative(0)
-			self.var_idx = i
-			self._derivative[i] = 1
-			yield i
-
 	# # Override calling the variable
 	def compute(self, *args, **kwargs):
 		if len(args) == 0:
@@ -464,11 +653,13 @@ class Constant(Node):
 	Always initiated with 0 derivative.
 	"""
 
+	__slots__ = ()
+	type = 'Constant'
+
 	def __init__(self, value):
 		super().__init__()
 		self.set_value(value)
 		self.set_derivative(0)
-		self.type = 'Constant'
 
 	def set_derivative(self, value):
 		self._derivative = value
@@ -487,9 +678,10 @@ class Constant(Node):
 
 class Addition(Node):
 
-	def __init__(self):
-		super().__init__()
-		self.type = 'Addition'
+	__slots__ = ()
+	type = 'Addition'
+	value_source = '({0} + {1})'
+	adjoint_source = ('{grad}', '{grad}')
 
 	@node_decorate('evaluate')
 	def eval(self, values):
@@ -506,30 +698,46 @@ class Addition(Node):
 	def reverse(self, values, grad_value):
 		return (grad_value, grad_value)
 
+	def rewrite(self):
+		left, right = self.children
+		if is_constant(right, 0):
+			return left
+		if is_constant(left, 0):
+			return right
+		return None
+
 class Negation(Node):
 
-	def __init__(self):
-		super().__init__()
-		self.type = 'Negation'
+	__slots__ = ()
+	type = 'Negation'
+	value_source = '(-{0})'
+	adjoint_source = ('(-{grad})',)
 
 	@node_decorate('evaluate')
 	def eval(self, values):
-		return -1*np.array(values[0])
+		return np.negative(values[0])
 
 	@node_decorate('differentiate')
 	def diff(self, values, diffs):
-		return -1*np.array(diffs[0])
+		return np.negative(diffs[0])
 
 	# Reverse mode
 	@node_decorate('reverse')
 	def reverse(self, values, grad_value):
-		return (-1*np.array(grad_value),)
+		return (np.negative(grad_value),)
+
+	def rewrite(self):
+		child = self.children[0]
+		if isinstance(child, Negation):
+			return child.children[0]
+		return None
 
 class Subtraction(Node):
 
-	def __init__(self):
-		super().__init__()
-		self.type = 'Subtraction'
+	__slots__ = ()
+	type = 'Subtraction'
+	value_source = '({0} - {1})'
+	adjoint_source = ('{grad}', '(-{grad})')
 
 	@node_decorate('evaluate')
 	def eval(self, values):
@@ -545,12 +753,21 @@ class Subtraction(Node):
 	def reverse(self, values, grad_value):
 		return (grad_value, -grad_value)
 
+	def rewrite(self):
+		left, right = self.children
+		if is_constant(right, 0):
+			return left
+		if is_constant(left, 0):
+			return -right
+		return None
+
 
 class Multiplication(Node):
 
-	def __init__(self):
-		super().__init__()
-		self.type = 'Multiplication'
+	__slots__ = ()
+	type = 'Multiplication'
+	value_source = '({0} * {1})'
+	adjoint_source = ('({1} * {grad})', '({0} * {grad})')
 
 	@node_decorate('evaluate')
 	def eval(self, values):
@@ -568,15 +785,26 @@ class Multiplication(Node):
 		right_out = np.multiply(left, grad_value)
 		return (left_out, right_out)
 
+	def rewrite(self):
+		left, right = self.children
+		if is_constant(left, 0) or is_constant(right, 0):
+			return self.make_constant(0)
+		if is_constant(right, 1):
+			return left
+		if is_constant(left, 1):
+			return right
+		return None
+
 class Division(Node):
 
-	def __init__(self):
-		super().__init__()
-		self.type = 'Division'
+	__slots__ = ()
+	type = 'Division'
+	# Value kept as a kernel call for its zero check
+	adjoint_source = ('np.divide({grad}, {1})', '(-np.divide({grad} * {0}, np.square({1})))')
 
 	@node_decorate('evaluate')
 	def eval(self, values):
-		if values[1] == 0:
+		if np.any(np.equal(values[1], 0)):
 			raise ZeroDivisionError('Division by zero.')
 		return np.divide(values[0], values[1])
 
@@ -584,7 +812,7 @@ class Division(Node):
 	def diff(self, values, diffs):
 		num = np.multiply(diffs[0], values[1]) - np.multiply(values[0], diffs[1])
 		denom = np.array(values[1])**2
-		if denom == 0:
+		if np.any(denom == 0):
 			raise ZeroDivisionError('Division by zero.')
 		return np.divide(num, denom)
 
@@ -596,11 +824,19 @@ class Division(Node):
 		denom_out = -1*np.divide(np.multiply(grad_value,numer), np.power(denom, 2))
 		return (numer_out, denom_out)
 
+	def rewrite(self):
+		numer, denom = self.children
+		if is_constant(denom, 1):
+			return numer
+		return None
+
 class Power(Node):
 
-	def __init__(self):
-		super().__init__()
-		self.type = 'Power'
+	__slots__ = ()
+	type = 'Power'
+	value_source = 'np.power({0}, {1})'
+	adjoint_source = ('({1} * np.power({0}, {1} - 1) * {grad})',
+					  '(positive_log({0}) * {value} * {grad})')
 
 	@node_decorate('evaluate')
 	def eval(self, values):
@@ -636,6 +872,72 @@ class Power(Node):
 	def reverse(self, values, grad_value):
 		base, exp = values
 		base_out = np.multiply(np.multiply(exp, np.power(base, exp-1)), grad_value)
-		exp_out = np.multiply(np.multiply(np.log(base), np.power(base, exp)), grad_value)
+		# Same convention as diff: no log term for non-positive bases
+		exp_out = np.multiply(np.multiply(positive_log(base), np.power(base, exp)), grad_value)
+
+		return (base_out, exp_out)
+
+	def rewrite(self):
+		base, exp = self.children
+		if is_constant(exp, 1):
+			return base
+		return None
+
+
+""" POWER SPECIALIZATIONS
+
+Chosen by Node.__pow__ and Node.__rpow__ when the exponent or the
+base is constant, so only the terms that can be nonzero are computed.
+The constant child still receives a zero contribution in reverse mode.
+"""
+
+class PowConstExp(Power):
+	""" base ** c, for a constant exponent c. """
+
+	__slots__ = ()
+	adjoint_source = ('({1} * np.power({0}, {1} - 1) * {grad})', None)
+
+	@node_decorate('differentiate')
+	def diff(self, values, diffs):
+		base, exp = values
+		return np.multiply(np.multiply(exp, np.power(base, np.subtract(exp, 1))), diffs[0])
+
+	@node_decorate('reverse')
+	def reverse(self, values, grad_value):
+		base, exp = values
+		return (np.multiply(np.multiply(exp, np.power(base, np.subtract(exp, 1))), grad_value), 0)
 
-		return (base_out, exp_out)
\ No newline at end of file
+class Square(PowConstExp):
+	""" base ** 2. """
+
+	__slots__ = ()
+	value_source = 'np.square({0})'
+	adjoint_source = ('(2 * {0} * {grad})', None)
+
+	@node_decorate('evaluate')
+	def eval(self, values):
+		return np.square(values[0])
+
+	@node_decorate('differentiate')
+	def diff(self, values, diffs):
+		return np.multiply(np.multiply(2, values[0]), diffs[0])
+
+	@node_decorate('reverse')
+	def reverse(self, values, grad_value):
+		return (np.multiply(np.multiply(2, values[0]), grad_value), 0)
+
+class PowConstBase(Power):
+	""" c ** exp, for a constant base c. """
+
+	__slots__ = ()
+	adjoint_source = (None, '(positive_log({0}) * {value} * {grad})')
+
+	@node_decorate('differentiate')
+	def diff(self, values, diffs):
+		base, exp = values
+		return np.multiply(np.multiply(positive_log(base), np.power(base, exp)), diffs[1])
+
+	@node_decorate('reverse')
+	def reverse(self, values, grad_value):
+		base, exp = values
+		return (0, np.multiply(np.multiply(positive_log(base), np.power(base, exp)), grad_value))
@@ -1,11 +1,13 @@
 import numpy as np
 from .node import Node
 from .node import node_decorate
+from .node import is_constant
+from .dual import Dual
 
 class Log(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Log"
+  __slots__ = ()
+  type = "Log"
+  value_source = "np.divide(np.log({0}), np.log({1}))"
 
   @node_decorate('evaluate')
   def eval(self, values):
@@ -16,6 +18,8 @@ class Log(Node):
   def diff(self, values, diffs):
     node_value, base_value = values
     node_diff, base_diff = diffs
+    if np.any(np.equal(node_value, 0)) or np.any(np.equal(base_value, 0)):
+      raise ZeroDivisionError('Division by zero.')
 
     # Ignores zero errors:
     # node_value, base_value = [np.array(val,dtype=float) for val in values]
@@ -45,270 +49,301 @@ class Log(Node):
 
     return (val_out, base_out)
 
+  def rewrite(self):
+    value, base = self.children
+    if is_constant(base, np.e):
+      return Node.make_node(NaturalLog(), value)
+    return None
+
 def log(node, base=np.e):
+  if isinstance(node, Dual) or isinstance(base, Dual):
+    return np.log(node) / np.log(base)
   return Node.make_node(Log(), node, base)
 
-class Exp(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Exponential"
+class UnaryOperator(Node):
+  """ Elementwise operator of one child.
+
+  Subclasses give the value in eval and the local derivative in
+  local_derivative, which may reuse the value from the eval sweep.
+  Forward and reverse mode both scale that local derivative, so no
+  transcendental is computed twice.
+  """
+  __slots__ = ()
+  reuses_value = True
+
+  # Source template of local_derivative for Tape.to_function, with {0}
+  # the child value and {value} the node's value. None when it needs
+  # checks, then the raw reverse kernel is called instead.
+  local_source = None
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    if cls.local_source is not None:
+      cls.adjoint_source = ('(%s * {grad})' % cls.local_source,)
+
+  def local_derivative(self, x, value):
+    raise NotImplementedError
+
+  def fused(self, x):
+    """ Value and local derivative at x, in one call. """
+    value = type(self).eval.__wrapped__(self, [x])
+    return value, self.local_derivative(x, value)
+
+  @node_decorate('differentiate')
+  def diff(self, values, diffs, value):
+    return np.multiply(self.local_derivative(values[0], value), diffs[0])
+
+  @node_decorate('reverse')
+  def reverse(self, values, grad_value, value):
+    return (np.multiply(self.local_derivative(values[0], value), grad_value),)
+
+class NaturalLog(UnaryOperator):
+  """ Log in base e, without a base child. Made by simplify(). """
+  __slots__ = ()
+  type = "Log"
+  value_source = "np.log({0})"
+
+  @node_decorate('evaluate')
+  def eval(self, values):
+    return np.log(values[0])
+
+  def local_derivative(self, x, value):
+    if np.any(np.equal(x, 0)):
+      raise ZeroDivisionError('Division by zero.')
+    return np.divide(1, x)
+
+  def rewrite(self):
+    child = self.children[0]
+    if isinstance(child, Exp):
+      return child.children[0]
+    return None
+
+class Exp(UnaryOperator):
+  __slots__ = ()
+  type = "Exponential"
+  value_source = "np.exp({0})"
+  local_source = "{value}"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.exp(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, values, diffs):
-    return np.exp(values[0]) * diffs[0]
+  def local_derivative(self, x, value):
+    return value
 
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-   	return (np.multiply(np.exp(values[0]), grad_value),)
+  def rewrite(self):
+    child = self.children[0]
+    if isinstance(child, NaturalLog):
+      return child.children[0]
+    return None
 
 def exp(node):
+  if isinstance(node, Dual):
+    return np.exp(node)
   return Node.make_node(Exp(), node)
 
-class Sqrt(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Squared Root"
+class Sqrt(UnaryOperator):
+  __slots__ = ()
+  type = "Squared Root"
+  value_source = "np.sqrt({0})"
+  local_source = "np.divide(0.5, {value})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.sqrt(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, values, diffs):
-    return 1/(2 * np.sqrt(values[0])) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-   	return (np.divide(grad_value, 2*np.sqrt(values[0])),)
+  def local_derivative(self, x, value):
+    return np.divide(1, np.multiply(2, value))
 
 def sqrt(node):
+  if isinstance(node, Dual):
+    return np.sqrt(node)
   return Node.make_node(Sqrt(), node)
 
-class Sin(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Sine"
+class Sin(UnaryOperator):
+  __slots__ = ()
+  type = "Sine"
+  value_source = "np.sin({0})"
+  local_source = "np.cos({0})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.sin(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    return np.cos(value[0]) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-   	return (np.multiply(grad_value, np.cos(values[0])),)
+  def local_derivative(self, x, value):
+    return np.cos(x)
 
 def sin(node):
+  if isinstance(node, Dual):
+    return np.sin(node)
   return Node.make_node(Sin(), node)
 
-class Cos(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Cosine"
+class Cos(UnaryOperator):
+  __slots__ = ()
+  type = "Cosine"
+  value_source = "np.cos({0})"
+  local_source = "(-np.sin({0}))"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.cos(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    return -np.sin(value[0]) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-   	return (np.multiply(-grad_value, np.sin(values[0])),)
+  def local_derivative(self, x, value):
+    return np.negative(np.sin(x))
 
 def cos(node):
+  if isinstance(node, Dual):
+    return np.cos(node)
   return Node.make_node(Cos(), node)
 
-class Tan(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Tangent"
+class Tan(UnaryOperator):
+  __slots__ = ()
+  type = "Tangent"
+  value_source = "np.tan({0})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.tan(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    denom = np.cos(value[0])
-    if np.any(np.round(denom, 4) == 0.0000):
-      raise ZeroDivisionError('Division by zero.')
-    return (np.divide(1, denom)**2) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-    denom = np.cos(values[0])
-    if np.any(np.round(denom, 4) == 0.0000):
+  def local_derivative(self, x, value):
+    # 1/cos(x)**2, too large once cos(x) rounds to 0 at 4 decimals
+    derivative = np.add(1, np.multiply(value, value))
+    if np.any(np.greater(derivative, 4e8)):
       raise ZeroDivisionError('Division by zero.')
-    return (np.multiply((np.divide(1, denom)**2), grad_value),)
+    return derivative
 
 def tan(node):
+  if isinstance(node, Dual):
+    return np.tan(node)
   return Node.make_node(Tan(), node)
 
-class Arcsin(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Arcsin"
+class Arcsin(UnaryOperator):
+  __slots__ = ()
+  type = "Arcsin"
+  value_source = "np.arcsin({0})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.arcsin(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    denom = np.sqrt(np.subtract(1, value[0]**2))
+  def local_derivative(self, x, value):
+    denom = np.sqrt(np.subtract(1, np.multiply(x, x)))
     if np.any(np.round(denom, 4) == 0.0000):
       raise ZeroDivisionError('Division by zero.')
-    return np.divide(1, denom) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-    denom = np.sqrt(np.subtract(1, values[0]**2))
-    if np.any(np.round(denom, 4) == 0.0000):
-      raise ZeroDivisionError('Division by zero.')
-    return (np.multiply(np.divide(1, denom), grad_value),)
+    return np.divide(1, denom)
 
 def arcsin(node):
+  if isinstance(node, Dual):
+    return np.arcsin(node)
   return Node.make_node(Arcsin(), node)
 
-class Arccos(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Arccos"
+class Arccos(UnaryOperator):
+  __slots__ = ()
+  type = "Arccos"
+  value_source = "np.arccos({0})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.arccos(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    denom = np.sqrt(np.subtract(1, value[0]**2))
+  def local_derivative(self, x, value):
+    denom = np.sqrt(np.subtract(1, np.multiply(x, x)))
     if np.any(np.round(denom, 4) == 0.0000):
       raise ZeroDivisionError('Division by zero.')
-    return -np.divide(1, denom) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-    denom = np.sqrt(np.subtract(1, values[0]**2))
-    if np.any(np.round(denom, 4) == 0.0000):
-      raise ZeroDivisionError('Division by zero.')
-    return (np.multiply(-np.divide(1, denom), grad_value),)
+    return np.divide(-1, denom)
 
 def arccos(node):
+  if isinstance(node, Dual):
+    return np.arccos(node)
   return Node.make_node(Arccos(), node)
 
-class Arctan(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Arctan"
+class Arctan(UnaryOperator):
+  __slots__ = ()
+  type = "Arctan"
+  value_source = "np.arctan({0})"
+  local_source = "np.divide(1, {0} * {0} + 1)"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.arctan(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    denom = np.add(value[0]**2, 1)
-    return np.divide(1, denom) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-    denom = np.add(values[0]**2, 1)
-    return (np.multiply(np.divide(1, denom), grad_value),)
+  def local_derivative(self, x, value):
+    return np.divide(1, np.add(np.multiply(x, x), 1))
 
 def arctan(node):
+  if isinstance(node, Dual):
+    return np.arctan(node)
   return Node.make_node(Arctan(), node)
 
-class Sinh(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Sinh"
+class Sinh(UnaryOperator):
+  __slots__ = ()
+  type = "Sinh"
+  value_source = "np.sinh({0})"
+  local_source = "np.cosh({0})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.sinh(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    return np.cosh(value[0]) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-  	return (np.multiply(np.cosh(values[0]), grad_value),)
+  def local_derivative(self, x, value):
+    return np.cosh(x)
 
 def sinh(node):
+  if isinstance(node, Dual):
+    return np.sinh(node)
   return Node.make_node(Sinh(), node)
 
-class Cosh(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Cosh"
+class Cosh(UnaryOperator):
+  __slots__ = ()
+  type = "Cosh"
+  value_source = "np.cosh({0})"
+  local_source = "np.sinh({0})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.cosh(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    return np.sinh(value[0]) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-  	return (np.multiply(np.sinh(values[0]), grad_value),)
+  def local_derivative(self, x, value):
+    return np.sinh(x)
 
 def cosh(node):
+  if isinstance(node, Dual):
+    return np.cosh(node)
   return Node.make_node(Cosh(), node)
 
-class Tanh(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Tanh"
+class Tanh(UnaryOperator):
+  __slots__ = ()
+  type = "Tanh"
+  value_source = "np.tanh({0})"
+  local_source = "(1 - {value} * {value})"
 
   @node_decorate('evaluate')
   def eval(self, values):
     return np.tanh(values[0])
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    denom = np.cosh(value[0])
-    return (np.divide(1, denom)**2) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-    denom = np.cosh(values[0])
-    return (np.multiply((np.divide(1, denom)**2), grad_value),)
+  def local_derivative(self, x, value):
+    return np.subtract(1, np.multiply(value, value))
 
 def tanh(node):
+  if isinstance(node, Dual):
+    return np.tanh(node)
   return Node.make_node(Tanh(), node)
 
-class Logistic(Node):
-  def __init__(self):
-    super().__init__()
-    self.type = "Logistic"
+class Logistic(UnaryOperator):
+  __slots__ = ()
+  type = "Logistic"
+  value_source = "np.divide(1, 1 + np.exp(-{0}))"
+  local_source = "({value} * (1 - {value}))"
 
   @node_decorate('evaluate')
   def eval(self, values):
     denom = np.add(1, np.exp(-values[0]))
     return np.divide(1, denom)
 
-  @node_decorate('differentiate')
-  def diff(self, value, diffs):
-    denom = np.power(np.add(1, np.exp(-value[0])), 2)
-    return np.divide(np.exp(-value[0]), denom) * diffs[0]
-
-  @node_decorate('reverse')
-  def reverse(self, values, grad_value):
-    denom = np.power(np.add(1, np.exp(-values[0])), 2)
-    return (np.multiply(np.divide(np.exp(-values[0]), denom), grad_value),)
+  def local_derivative(self, x, value):
+    return np.multiply(value, np.subtract(1, value))
 
 def logistic(node):
-  return Node.make_node(Logistic(), node)
\ No newline at end of file
+  if isinstance(node, Dual):
+    return 1 / (1 + np.exp(-node))
+  return Node.make_node(Logistic(), node)
@@ -0,0 +1,204 @@
+"""
+Profiling of Node.compute
+
+Within a profile() block, the eval, diff and reverse methods that
+node_decorate wraps are replaced by timed versions, recording for
+every node and every operator type the number of calls, the wall time
+spent in the node itself (excluding the children it calls) and the
+bytes of the arrays it produces. Calls answered from memoized
+values are not counted. The original methods are restored on
+exit, so outside a profile() block nothing is added to compute.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from .node import Node
+
+# Method of each node_decorate mode, and its name in reports
+MODES = {'evaluate': 'eval', 'differentiate': 'diff', 'reverse': 'reverse'}
+
+class ProfileError(Exception):
+	pass
+
+def result_bytes(result):
+	""" Bytes of the arrays in a kernel result, 0 for None. """
+	if result is None:
+		return 0
+	if isinstance(result, (tuple, list)):
+		return sum(result_bytes(item) for item in result)
+	if isinstance(result, dict):
+		return sum(result_bytes(item) for item in result.values())
+	return np.asarray(result).nbytes
+
+def reused(node, method):
+	""" Whether a call returns without running the kernel: the value
+	or tangent is memoized, or the node still waits for gradients.
+	"""
+	if method == 'eval':
+		return Node._state.epoch is not None and node._eval_stamp == Node._state.epoch
+	if method == 'diff':
+		return Node._state.sweep is not None and node._diff_stamp == Node._state.sweep
+	return not node.ready_to_reverse()
+
+class Record():
+	""" Calls, self time in seconds and bytes produced. """
+
+	__slots__ = ('calls', 'seconds', 'bytes')
+
+	def __init__(self):
+		self.calls = 0
+		self.seconds = 0.0
+		self.bytes = 0
+
+	def add(self, other):
+		self.calls += other.calls
+		self.seconds += other.seconds
+		self.bytes += other.bytes
+
+	def __repr__(self):
+		return 'Record(calls=%d, seconds=%g, bytes=%d)' % (self.calls, self.seconds, self.bytes)
+
+class Profile():
+	""" Measurements collected by a profile() block.
+
+	Nodes are held by the profile, so they stay alive as long as it does.
+	"""
+
+	def __init__(self):
+		# id of node: node, in the order they were first called
+		self.nodes = {}
+		# (id of node, method name): Record
+		self.records = {}
+		# Collapsed call stack: self time in seconds
+		self.stacks = {}
+		# Frames of the calls in progress, with their children's time,
+		# per thread
+		self._local = threading.local()
+
+	def names(self):
+		""" {id of node: type with the index of the node}, to tell
+		nodes of one type apart.
+		"""
+		return {key: '%s[%d]' % (node.type, idx) for idx, (key, node) in enumerate(self.nodes.items())}
+
+	def node_record(self, node, methods=('eval', 'diff', 'reverse')):
+		""" Totals of a node over the given methods. """
+		total = Record()
+		for method in methods:
+			record = self.records.get((id(node), method))
+			if record is not None:
+				total.add(record)
+		return total
+
+	def by_node(self):
+		""" {(node, method): Record}, in the order nodes were called. """
+		return {(self.nodes[key], method): record for (key, method), record in self.records.items()}
+
+	def by_type(self):
+		""" {(node type, method): Record}, summed over nodes. """
+		totals = {}
+		for (key, method), record in self.records.items():
+			totals.setdefault((self.nodes[key].type, method), Record()).add(record)
+		return totals
+
+	def table(self, by='type'):
+		""" Text table sorted by time, per type or per node. """
+		if by == 'type':
+			rows = [(node_type, method, record) for (node_type, method), record in self.by_type().items()]
+		elif by == 'node':
+			names = self.names()
+			rows = [(names[key], method, record) for (key, method), record in self.records.items()]
+		else:
+			raise ValueError('Profiles are tabled by "type" or "node".')
+		rows.sort(key=lambda row: row[2].seconds, reverse=True)
+		lines = ['%-24s %-8s %8s %12s %12s' % (by, 'method', 'calls', 'seconds', 'bytes')]
+		for name, method, record in rows:
+			lines.append('%-24s %-8s %8d %12.6f %12d' % (name, method, record.calls, record.seconds, record.bytes))
+		return '\n'.join(lines)
+
+	def collapsed(self):
+		""" Stacks in the collapsed format of flamegraph.pl and
+		speedscope, one 'frame;frame;frame microseconds' per line.
+		"""
+		return '\n'.join('%s %d' % (stack, round(seconds * 1e6)) for stack, seconds in self.stacks.items())
+
+	def write_collapsed(self, filename):
+		with open(filename, 'w') as file:
+			file.write(self.collapsed() + '\n')
+
+	def instrument(self, fn, method):
+		""" Timed version of a node_decorate wrapper. """
+		profile = self
+
+		def profiled(self, *args):
+			if reused(self, method):
+				return fn(self, *args)
+			key = id(self)
+			if key not in profile.nodes:
+				profile.nodes[key] = self
+			frames = getattr(profile._local, 'frames', None)
+			if frames is None:
+				frames = profile._local.frames = []
+			frame = ['%s.%s' % (self.type, method), 0.0]
+			frames.append(frame)
+			start = time.perf_counter()
+			try:
+				result = fn(self, *args)
+			finally:
+				elapsed = time.perf_counter() - start
+				frames.pop()
+			if frames:
+				frames[-1][1] += elapsed
+			own = elapsed - frame[1]
+
+			record = profile.records.get((key, method))
+			if record is None:
+				record = profile.records[(key, method)] = Record()
+			record.calls += 1
+			record.seconds += own
+			record.bytes += result_bytes(result)
+			stack = ';'.join(['compute'] + [name for name, _ in frames] + [frame[0]])
+			profile.stacks[stack] = profile.stacks.get(stack, 0.0) + own
+			return result
+
+		profiled.__name__ = fn.__name__
+		profiled.__doc__ = fn.__doc__
+		# Tapes call the raw kernel, which stays reachable
+		profiled.__wrapped__ = fn.__wrapped__
+		profiled.node_mode = fn.node_mode
+		return profiled
+
+def node_classes(cls=Node):
+	""" Node and every subclass of it. """
+	yield cls
+	for subclass in cls.__subclasses__():
+		yield from node_classes(subclass)
+
+_active = []
+
+@contextmanager
+def profile():
+	""" Profile every Node.compute run inside a with block.
+
+	Yields the Profile being filled. Methods are instrumented on the
+	classes, so computes in every thread are profiled; blocks cannot
+	be nested.
+	"""
+	if _active:
+		raise ProfileError('A profile is already running.')
+	result = Profile()
+	patched = []
+	for cls in set(node_classes()):
+		for name, fn in list(vars(cls).items()):
+			if getattr(fn, 'node_mode', None) is not None and MODES[fn.node_mode] == name:
+				patched.append((cls, name, fn))
+				setattr(cls, name, result.instrument(fn, name))
+	_active.append(result)
+	try:
+		yield result
+	finally:
+		for cls, name, fn in patched:
+			setattr(cls, name, fn)
+		_active.pop()
@@ -1,19 +1,55 @@
 """ Settings submodule """
 
+import threading
+from contextlib import contextmanager
+
 # Forward or reverse modes, options are "reverse" or "forward"
 __DEFAULT_AD_MODE__ = "forward"
 
+# Whether structurally identical nodes are shared at build time
+__DEFAULT_INTERNING__ = False
+
+def check_mode(mode):
+	if mode not in ["reverse", "forward"]:
+		raise ValueError("Mode must be either \"forward\" or \"reverse\"")
+
 class Settings():
 	def __init__(self):
 		self.mode = __DEFAULT_AD_MODE__
+		self.interning = __DEFAULT_INTERNING__
+
+		# Modes set by use_mode, per thread
+		self._local = threading.local()
 
 	def set_mode(self, mode):
-		if mode not in ["reverse", "forward"]:
-			raise ValueError("Mode must be either \"forward\" or \"reverse\"")
+		""" Set the default mode, for every thread. """
+		check_mode(mode)
 		self.mode = mode
 
 	def current_mode(self):
-		return self.mode
+		return getattr(self._local, 'mode', None) or self.mode
+
+	@contextmanager
+	def use_mode(self, mode):
+		""" Use a mode in the current thread only, for the
+		duration of a with block.
+		"""
+		check_mode(mode)
+		previous = getattr(self._local, 'mode', None)
+		self._local.mode = mode
+		try:
+			yield self
+		finally:
+			self._local.mode = previous
+
+	def set_interning(self, interning):
+		""" When on, building an operator node that already exists
+		over the same children returns the existing node.
+		"""
+		self.interning = bool(interning)
+
+	def current_interning(self):
+		return self.interning
 
 # Global settings
 settings = Settings()
@@ -0,0 +1,502 @@
+"""
+Tape Logic for Automatic Differentiation
+
+A tape is a flattened view of a computational graph: every node
+reachable from the output, in topological order (children before
+parents), with children referenced by integer slot. Evaluation and
+differentiation then run as single loops over the tape instead of
+recursing through children on every call.
+"""
+
+import numbers
+import numpy as np
+from .settings import settings, check_mode
+from .dual import Dual
+
+def topological_order(outputs):
+	""" List every node reachable from one or several outputs,
+	children first. Shared nodes appear once.
+
+	Uses an explicit stack rather than recursion, so arbitrarily
+	deep graphs can be ordered.
+	"""
+	if not isinstance(outputs, (list, tuple)):
+		outputs = [outputs]
+	order = []
+	visited = set()
+	for output in outputs:
+		if id(output) in visited:
+			continue
+		visited.add(id(output))
+		stack = [(output, iter(output.children))]
+		while stack:
+			node, children = stack[-1]
+			for child in children:
+				if id(child) not in visited:
+					visited.add(id(child))
+					stack.append((child, iter(child.children)))
+					break
+			else:
+				stack.pop()
+				order.append(node)
+	return order
+
+def reduce_to_shape(grad, shape):
+	""" Sum an adjoint over the axes its variable was broadcast along. """
+	grad = np.asarray(grad)
+	while grad.ndim > len(shape):
+		grad = np.sum(grad, axis=0)
+	for axis, size in enumerate(shape):
+		if size == 1 and grad.shape[axis] != 1:
+			grad = np.sum(grad, axis=axis, keepdims=True)
+	return np.broadcast_to(grad, shape)
+
+def forward_seeds(inputs, ndim):
+	""" Seed tangents for one vectorized forward sweep.
+
+	Every scalar input gets its own row of a tangent matrix of shape
+	(n_inputs, ...), so a single sweep carries every direction at
+	once. Trailing dimensions are padded to ndim so that tangents of
+	scalar and vector nodes broadcast against values correctly.
+
+	Returns the seed of each input and the rows it occupies.
+	"""
+	sizes = [np.size(value) for value in inputs.values()]
+	total = sum(sizes)
+	seeds = {}
+	rows = {}
+	start = 0
+	for (name, value), size in zip(inputs.items(), sizes):
+		seed = np.zeros((total, size))
+		seed[start:start + size] = np.eye(size)
+		shape = (total,) + (1,) * (ndim - np.ndim(value)) + np.shape(value)
+		seeds[name] = np.reshape(seed, shape)
+		rows[name] = slice(start, start + size)
+		start += size
+	return seeds, rows
+
+def tangent_block(tangent, rows, input_value, value, ndim):
+	""" d(value)/d(input) from a tangent matrix, shaped input + value. """
+	padded = (1,) * (ndim - np.ndim(value)) + np.shape(value)
+	# Tangents without the leading input axis do not depend on any input
+	block = tangent[rows] if np.ndim(tangent) == ndim + 1 else 0
+	block = np.broadcast_to(block, (rows.stop - rows.start,) + padded)
+	return np.array(np.reshape(block, np.shape(input_value) + np.shape(value)))
+
+def tangent_derivative(tangent, rows, input_value, value, ndim):
+	""" Derivative in the convention of Node.derivative().
+
+	Scalar inputs give d(value)/d(input). Vector inputs give the
+	elementwise derivative, d(value[i])/d(input[i]), when the value
+	has the same size, and the full block otherwise.
+	"""
+	block = tangent_block(tangent, rows, input_value, value, ndim)
+	if not isinstance(input_value, np.ndarray):
+		return block[()] if np.ndim(block) == 0 else block
+	size = np.size(input_value)
+	if np.size(value) == size:
+		return np.diagonal(np.reshape(block, (size, size))).copy()
+	return block
+
+def generate_source(tape):
+	""" Straight-line Python source of a function returning the value
+	and the reverse-mode gradient of a single-output tape.
+
+	Nodes with source templates become one NumPy expression each, other
+	nodes call their raw kernel. Values and adjoints live in local
+	variables, v<slot> and g<slot>. Adjoints are only propagated to
+	slots that depend on a variable.
+
+	Returns the source and the namespace it must be run in.
+	"""
+	from .node import positive_log
+	namespace = {'np': np, 'positive_log': positive_log, 'names': tape.output._variables.keys()}
+	lines = ['def function(*args, **kwargs):',
+			 '\tif len(args) > 1 or (args and kwargs):',
+			 '\t\traise TypeError(\'Input not recognized.\')',
+			 '\tinputs = args[0] if args else kwargs',
+			 '\tif inputs.keys() != names:',
+			 '\t\traise TypeError(\'Input not recognized.\')']
+
+	# Values, children first
+	depends = [False] * len(tape)
+	for idx, node in enumerate(tape.nodes):
+		children = tape.children[idx]
+		args = ['v%d' % child for child in children]
+		depends[idx] = node.type == 'Variable' or any(depends[child] for child in children)
+		if node.type == 'Variable':
+			lines.append('\tv%d = inputs[%r]' % (idx, node.name))
+		elif not children:
+			namespace['n%d' % idx] = node
+			lines.append('\tv%d = n%d.value()' % (idx, idx))
+		elif node.value_source is not None:
+			lines.append('\tv%d = %s' % (idx, node.value_source.format(*args)))
+		else:
+			namespace['n%d' % idx] = node
+			namespace['k%d' % idx] = tape.eval_kernels[idx]
+			lines.append('\tv%d = k%d(n%d, [%s])' % (idx, idx, idx, ', '.join(args)))
+
+	# Adjoints, parents first
+	output = tape.outputs[0]
+	reached = {output}
+	lines.append('\tg%d = 1' % output)
+	for idx in reversed(range(len(tape))):
+		node = tape.nodes[idx]
+		children = tape.children[idx]
+		if idx not in reached or not children:
+			continue
+		args = ['v%d' % child for child in children]
+		grad = 'g%d' % idx
+		if node.adjoint_source is not None:
+			contributions = [None if source is None else source.format(*args, value='v%d' % idx, grad=grad)
+							 for source in node.adjoint_source]
+		elif any(depends[child] for child in children):
+			namespace['n%d' % idx] = node
+			namespace['r%d' % idx] = tape.reverse_kernels[idx]
+			extra = ', v%d' % idx if node.reuses_value else ''
+			lines.append('\tc%d = r%d(n%d, [%s], %s%s)' % (idx, idx, idx, ', '.join(args), grad, extra))
+			contributions = ['c%d[%d]' % (idx, pos) for pos in range(len(children))]
+		else:
+			continue
+		for child, contribution in zip(children, contributions):
+			if contribution is None or not depends[child]:
+				continue
+			if child in reached:
+				lines.append('\tg%d = g%d + %s' % (child, child, contribution))
+			else:
+				lines.append('\tg%d = %s' % (child, contribution))
+				reached.add(child)
+
+	derivative = []
+	for name, slots in tape.variables.items():
+		grads = ['g%d' % slot for slot in slots if slot in reached]
+		derivative.append('%r: %s' % (name, ' + '.join(grads) if grads else '0'))
+	lines.append('\treturn v%d, {%s}' % (output, ', '.join(derivative)))
+	return '\n'.join(lines) + '\n', namespace
+
+class Evaluation():
+	""" Class Evaluation
+
+	Results of one evaluation of a tape: the value at every slot,
+	the derivative of the output and, in forward mode, its full
+	Jacobian blocks. Each call gets its own, so concurrent calls
+	on one tape share no state.
+	"""
+
+	__slots__ = ('values', '_derivative', '_jacobian', 'mode')
+
+	def __init__(self, values, derivative, jacobian, mode):
+		self.values = values
+		self._derivative = derivative
+		self._jacobian = jacobian
+		self.mode = mode
+
+	def __repr__(self):
+		return 'Evaluation(Mode = %r, Value = %r, Derivative = %r)' % (self.mode, self.value(), self.derivative())
+
+	def value(self):
+		return self.values[-1]
+
+	def derivative(self):
+		return self._derivative
+
+	def jacobian(self):
+		""" Derivative blocks shaped input + output, None in reverse mode. """
+		return self._jacobian
+
+class Tape():
+	""" Class Tape
+
+	Compiled form of the graph below a node, or below several
+	output nodes sharing subgraphs. Intermediate values and
+	derivatives are kept in per-slot lists on the tape, never
+	on the nodes themselves.
+	"""
+
+	def __init__(self, output):
+		self.output = output
+		outputs = output if isinstance(output, (list, tuple)) else [output]
+		self.nodes = topological_order(outputs)
+		slots = {id(node): idx for idx, node in enumerate(self.nodes)}
+
+		# Slot of each output node
+		self.outputs = [slots[id(node)] for node in outputs]
+
+		# Children of each slot, as slot indices
+		self.children = [tuple(slots[id(child)] for child in node.children)
+						 for node in self.nodes]
+
+		# Variable name -> slots holding a variable of that name
+		self.variables = {}
+		for idx, node in enumerate(self.nodes):
+			if node.type == 'Variable':
+				self.variables.setdefault(node.name, []).append(idx)
+
+		# Undecorated computation functions of each operator slot
+		self.eval_kernels = [self.kernel(node, 'eval') for node in self.nodes]
+		self.diff_kernels = [self.kernel(node, 'diff') for node in self.nodes]
+		self.reverse_kernels = [self.kernel(node, 'reverse') for node in self.nodes]
+
+		# Evaluation from the last compute
+		self._last = None
+		self._function = None
+
+	@staticmethod
+	def kernel(node, name):
+		""" Raw computation function behind a node_decorate wrapper. """
+		if not node.children:
+			return None
+		kernel = getattr(getattr(node, name, None), '__wrapped__', None)
+		if kernel is None:
+			raise TypeError('Node type %r has no node_decorate %s to compile.' % (node.type, name))
+		return kernel
+
+	def __len__(self):
+		return len(self.nodes)
+
+	def __call__(self, *args, **kwargs):
+		return self.compute(*args, **kwargs)
+
+	def __repr__(self):
+		return 'Tape(Nodes = %r, Value = %r, Derivative = %r)' % (len(self), self.value(), self.derivative())
+
+	""" ATTRIBUTES """
+
+	def value(self):
+		if self._last is None:
+			return None
+		return self._last.value()
+
+	def derivative(self):
+		if self._last is None:
+			return {}
+		return self._last.derivative()
+
+	def jacobian(self):
+		""" Full derivative blocks from the last forward compute,
+		each shaped input + output.
+		"""
+		if self._last is None:
+			return None
+		return self._last.jacobian()
+
+	""" COMPUTATION
+
+	Single loops over the tape. Each takes and returns per-slot
+	lists, so no state is written to the nodes.
+	"""
+
+	def evaluate(self, input_dict, batch_ndim=None):
+		""" Forward sweep computing the value at every slot.
+
+		With batch_ndim, inputs are batches of points with that many
+		point axes, and other leaves get a singleton batch axis and
+		are padded to match.
+		"""
+		values = [None] * len(self.nodes)
+		for idx, node in enumerate(self.nodes):
+			kernel = self.eval_kernels[idx]
+			if kernel is not None:
+				values[idx] = kernel(node, [values[child] for child in self.children[idx]])
+			elif node.type == 'Variable':
+				value = input_dict[node.name]
+				if not isinstance(value, (numbers.Number, np.ndarray, Dual)):
+					raise TypeError('Value must be numeric or a numpy array.')
+				values[idx] = value
+			elif batch_ndim is not None:
+				value = np.asarray(node.value())
+				values[idx] = np.reshape(value, (1,) * (batch_ndim - value.ndim + 1) + value.shape)
+			else:
+				values[idx] = node.value()
+		return values
+
+	def tangent(self, values, seeds):
+		""" Forward derivative sweep for the given variable seeds,
+		returning the tangent at every slot.
+		"""
+		diffs = [0] * len(self.nodes)
+		for idx, node in enumerate(self.nodes):
+			kernel = self.diff_kernels[idx]
+			if kernel is not None:
+				children = self.children[idx]
+				child_values = [values[child] for child in children]
+				child_diffs = [diffs[child] for child in children]
+				if node.reuses_value:
+					diffs[idx] = kernel(node, child_values, child_diffs, values[idx])
+				else:
+					diffs[idx] = kernel(node, child_values, child_diffs)
+			elif node.type == 'Variable':
+				diffs[idx] = seeds.get(node.name, 0)
+		return diffs
+
+	def forward(self, values):
+		""" Forward mode: one vectorized tangent sweep.
+
+		Each slot carries a tangent matrix with one row per scalar
+		input, so the whole Jacobian of the output comes out of a
+		single pass.
+
+		Returns the derivative and the full Jacobian blocks.
+		"""
+		inputs = {name: values[slots[0]] for name, slots in self.variables.items()}
+		ndim = max(np.ndim(value) for value in values)
+		seeds, rows = forward_seeds(inputs, ndim)
+		tangent = self.tangent(values, seeds)[-1]
+
+		jacobian = {}
+		derivative = {}
+		for name, value in inputs.items():
+			jacobian[name] = tangent_block(tangent, rows[name], value, values[-1], ndim)
+			derivative[name] = tangent_derivative(tangent, rows[name], value, values[-1], ndim)
+		return derivative, jacobian
+
+	def adjoint(self, values, seeds):
+		""" Reverse derivative sweep from the given slot seeds,
+		returning the adjoint at every slot. Slots no seed reaches
+		are skipped and left as None.
+		"""
+		grads = [None] * len(self.nodes)
+		for slot, seed in seeds.items():
+			grads[slot] = seed
+		for idx in reversed(range(len(self.nodes))):
+			kernel = self.reverse_kernels[idx]
+			if kernel is None or grads[idx] is None:
+				continue
+			children = self.children[idx]
+			node = self.nodes[idx]
+			if node.reuses_value:
+				results = kernel(node, [values[child] for child in children], grads[idx], values[idx])
+			else:
+				results = kernel(node, [values[child] for child in children], grads[idx])
+			for child, result in zip(children, results):
+				grads[child] = result if grads[child] is None else grads[child] + result
+		return grads
+
+	def reverse(self, values):
+		""" Reverse mode: one adjoint sweep in reverse tape order. """
+		grads = self.adjoint(values, {len(self.nodes) - 1: 1})
+
+		derivative = {}
+		for name, slots in self.variables.items():
+			derivative[name] = sum(0 if grads[slot] is None else grads[slot] for slot in slots)
+		return derivative
+
+	def run(self, input_dict, mode=None):
+		""" Evaluate and differentiate at the given variable values,
+		returning the results as a new Evaluation.
+
+		Nothing is stored on the tape or its nodes, so one tape can
+		be run from several threads at once. The mode defaults to
+		the current mode from settings.
+		"""
+		if len(self.outputs) > 1:
+			raise TypeError('Tape has several outputs, use jacobian instead.')
+		if input_dict.keys() != self.output._variables.keys():
+			raise TypeError('Input not recognized.')
+		if mode is None:
+			mode = settings.current_mode()
+		check_mode(mode)
+
+		values = self.evaluate(input_dict)
+		jacobian = None
+		if mode == "forward":
+			derivative, jacobian = self.forward(values)
+		else:
+			derivative = self.reverse(values)
+		return Evaluation(values, derivative, jacobian, mode)
+
+	def compute(self, *args, **kwargs):
+		""" Evaluate and differentiate at the given variable values.
+
+		Accepts the same inputs as Node.compute, and uses the
+		differentiation mode from settings. The results are kept
+		as the tape's last evaluation.
+		"""
+		if len(args) == 0:
+			input_dict = kwargs
+		elif len(args) == 1 and not kwargs:
+			input_dict = args[0]
+		else:
+			raise TypeError('Input not recognized.')
+
+		self._last = self.run(input_dict)
+		return self
+
+	def to_function(self):
+		""" Compile the tape into a straight-line Python function.
+
+		The function takes the same inputs as compute and returns
+		(value, derivative), with the derivative as in reverse mode.
+		It keeps no state, and is built once and cached on the tape.
+		Its source is available as its source attribute.
+		"""
+		if len(self.outputs) > 1:
+			raise TypeError('Tape has several outputs, use jacobian instead.')
+		if self._function is None:
+			source, namespace = generate_source(self)
+			exec(compile(source, '<autodiff.to_function>', 'exec'), namespace)
+			self._function = namespace['function']
+			self._function.source = source
+		return self._function
+
+	def compute_batch(self, input_dict):
+		""" Evaluate and differentiate at a batch of points.
+
+		Every input has a leading batch axis; the remaining axes are
+		the shape of one point. The elementwise kernels run once over
+		the whole batch, with a single forward sweep for derivatives.
+		When inputs differ in point shape, results are padded to the
+		widest one.
+
+		Returns (values, derivatives), both with the batch axis first.
+		Derivatives follow the convention of Node.derivative() point
+		by point.
+		"""
+		if len(self.outputs) > 1:
+			raise TypeError('Tape has several outputs, use jacobian instead.')
+		if input_dict.keys() != self.output._variables.keys():
+			raise TypeError('Input not recognized.')
+
+		points = {}
+		for name, value in input_dict.items():
+			value = np.asarray(value)
+			if value.ndim == 0 or not np.issubdtype(value.dtype, np.number):
+				raise TypeError('Batched inputs must be numeric arrays with a leading batch axis.')
+			points[name] = value
+		sizes = {len(value) for value in points.values()}
+		if len(sizes) > 1:
+			raise ValueError('Batched inputs must share the same batch size.')
+		batch = sizes.pop() if sizes else 1
+		if batch == 0:
+			raise ValueError('Batched inputs must hold at least one point.')
+
+		# Pad point axes so scalar and vector points, and constants,
+		# broadcast together
+		constants = [np.ndim(node.value()) for node in self.nodes if not node.children and node.type != 'Variable']
+		ndim = max([value.ndim - 1 for value in points.values()] + constants + [0])
+		padded = {name: np.reshape(value, (batch,) + (1,) * (ndim - value.ndim + 1) + value.shape[1:])
+				  for name, value in points.items()}
+
+		values = self.evaluate(padded, ndim)
+		value = np.broadcast_to(values[-1], np.broadcast_shapes((batch,) + (1,) * ndim, np.shape(values[-1])))
+
+		# Seeds of one point, broadcast along the batch axis
+		seeds, rows = forward_seeds({name: point[0] for name, point in points.items()}, ndim)
+		seeds = {name: np.expand_dims(seed, 1) for name, seed in seeds.items()}
+		tangent = self.tangent(values, seeds)[-1]
+
+		derivative = {}
+		for name, point in points.items():
+			size = rows[name].stop - rows[name].start
+			block = tangent[rows[name]] if np.ndim(tangent) == ndim + 2 else 0
+			block = np.broadcast_to(block, (size,) + value.shape)
+			if point.ndim == 1:
+				result = block[0]
+			elif np.prod(value.shape[1:]) == size:
+				flat = np.reshape(block, (size, batch, size))
+				result = np.reshape(np.einsum('ibi->bi', flat), point.shape)
+			else:
+				result = np.moveaxis(block, 0, 1)
+			derivative[name] = np.array(result)
+
+		return np.array(value), derivative
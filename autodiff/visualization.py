@@ -1,9 +1,17 @@
 from graphviz import Digraph
 import pandas as pd
 
-def create_computational_graph(node):
-    """ Creates a computational graph for a given node. """
+def create_computational_graph(node, heatmap=None, profile=None):
+    """ Creates a computational graph for a given node.
+
+    With heatmap "time" or "memory", nodes are filled from pale yellow
+    to dark red by the time they took or the bytes of the values and
+    derivatives they produced in a profiled compute, given as profile
+    (see autodiff.profiling.profile).
+    """
     graph = CompGraph()
+    if heatmap is not None:
+        graph.set_heatmap(node, heatmap, profile)
     graph.build_graph(node)
     return graph
 
@@ -23,6 +31,8 @@ class CompGraph(Digraph):
         self.added_nodes = set()
         self.added_edges = set()
         self.graph_attr.update(rankdir="BT")
+        self.heatmap = None
+        self.costs = {}
 
     @staticmethod
     def get_id(node):
@@ -54,11 +64,48 @@ class CompGraph(Digraph):
         else:
             return "oval"
 
+    def set_heatmap(self, top_node, heatmap, profile):
+        """ Measures the cost of every node below top_node. """
+        if heatmap not in ("time", "memory"):
+            raise ValueError("Heatmap must be either \"time\" or \"memory\"")
+        if profile is None:
+            raise ValueError("A heatmap needs the profile of a compute.")
+        self.heatmap = heatmap
+        stack = [top_node]
+        while stack:
+            node = stack.pop()
+            if CompGraph.get_id(node) in self.costs:
+                continue
+            record = profile.node_record(node)
+            cost = record.seconds if heatmap == "time" else record.bytes
+            self.costs[CompGraph.get_id(node)] = cost
+            stack.extend(node.children)
+        self.highest = max(self.costs.values()) or 1
+
+    def get_heat(self, node):
+        """ Fill color and label line of a node's cost, on the
+        9 color yellow to red scale of graphviz.
+        """
+        cost = self.costs[CompGraph.get_id(node)]
+        level = 1 + round(8 * cost / self.highest)
+        if self.heatmap == "time":
+            text = "%.1f us" % (cost * 1e6)
+        else:
+            text = "%d B" % cost
+        return str(level), text
+
     def add_node(self, node):
+        attributes = {}
+        label = CompGraph.get_label(node)
+        if self.heatmap is not None:
+            level, text = self.get_heat(node)
+            attributes = {"style": "filled", "colorscheme": "ylorrd9", "fillcolor": level}
+            label += "\n" + text
         super().node(CompGraph.get_id(node),
-                     label=CompGraph.get_label(node),
+                     label=label,
                      color=CompGraph.get_color(node),
-                     shape=CompGraph.get_shape(node))
+                     shape=CompGraph.get_shape(node),
+                     **attributes)
         self.added_nodes.add(CompGraph.get_id(node))
 
     def add_edge(self, child, parent):
@@ -0,0 +1,73 @@
+""" Memory benchmark for graph construction.
+
+Reports the bytes allocated per node when building a large graph,
+before any values are computed, next to the same graph in the
+unslotted layout nodes had before: an instance __dict__ holding
+the type name and a copy of the variable dict on every node.
+
+Usage: python benchmarks/bench_memory.py [n_nodes]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autodiff.node import Variable
+from autodiff.operators import sin
+
+class UnslottedNode():
+	""" Reference node with the attributes of the unslotted layout. """
+
+	def __init__(self, node, children):
+		self._value = None
+		self._derivative = {}
+		self._variables = dict(node._variables)
+		self.children = children
+		self.type = str(node.type)
+		self._grad_value = 0
+		self._cur_grad_count = 0
+		self._grad_count = 0
+		self._eval_stamp = None
+		self._diff_stamp = None
+		self._tangent = None
+		self._tape = None
+
+def build_graph(n_nodes):
+	""" A chain of operators over two variables, about n_nodes long. """
+	x = Variable("x")
+	y = Variable("y")
+	node = x
+	for i in range(n_nodes // 3):
+		node = sin(node * y) + x
+	return node
+
+def build_reference(graph):
+	""" Copy of graph in the unslotted layout. """
+	copies = {}
+	for node in graph.compile().nodes:
+		copies[id(node)] = UnslottedNode(node, tuple(copies[id(child)] for child in node.children))
+	return copies[id(graph)]
+
+def allocated(build):
+	""" Bytes allocated by build(), and its result. """
+	tracemalloc.start()
+	start = tracemalloc.take_snapshot()
+	result = build()
+	used = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(start, 'filename'))
+	tracemalloc.stop()
+	return used, result
+
+def bytes_per_node(n_nodes):
+	""" Bytes per node of the slotted graph and of the reference. """
+	used, graph = allocated(lambda: build_graph(n_nodes))
+	count = len(graph.compile().nodes)
+	reference_used, reference = allocated(lambda: build_reference(graph))
+	return used / count, reference_used / count
+
+if __name__ == '__main__':
+	n_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+	slotted, unslotted = bytes_per_node(n_nodes)
+	print('%d nodes: %.0f bytes per node, %.0f unslotted (%.0f%% less)'
+		  % (n_nodes, slotted, unslotted, 100 * (1 - slotted / unslotted)))
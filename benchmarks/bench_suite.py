@@ -0,0 +1,234 @@
+""" Timing benchmarks for the hot paths of autodiff.
+
+Covers graph construction, compute in forward and reverse mode as the
+graph grows and shares more nodes, vector variable widths, every
+operator, and fractal_grid throughput. Results are written as JSON;
+given a baseline written by an earlier run, each benchmark is compared
+against it and slowdowns beyond the threshold, widened by the timing
+noise of both runs, are reported as regressions, with a non-zero exit
+status. Compare runs of the same kind (--quick or not) on the same
+machine; a warning is printed otherwise. benchmarks/baseline.json and
+benchmarks/baseline_quick.json hold a full and a quick run.
+
+Usage: python benchmarks/bench_suite.py [--quick] [--output results.json]
+	[--baseline benchmarks/baseline.json] [--threshold 0.2] [--noise 3]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autodiff.node import Variable
+from autodiff.settings import settings
+from autodiff import operators
+from examples.fractals import fractal_grid
+
+# Operators of operators.py, with an input inside their domain
+OPERATORS = {
+	'exp': (operators.exp, 0.5),
+	'log': (operators.log, 0.5),
+	'log2': (lambda node: operators.log(node, 2), 0.5),
+	'sqrt': (operators.sqrt, 0.5),
+	'sin': (operators.sin, 0.5),
+	'cos': (operators.cos, 0.5),
+	'tan': (operators.tan, 0.5),
+	'arcsin': (operators.arcsin, 0.5),
+	'arccos': (operators.arccos, 0.5),
+	'arctan': (operators.arctan, 0.5),
+	'sinh': (operators.sinh, 0.5),
+	'cosh': (operators.cosh, 0.5),
+	'tanh': (operators.tanh, 0.5),
+	'logistic': (operators.logistic, 0.5),
+	'add': (lambda node: node + node, 0.5),
+	'sub': (lambda node: node - 2 * node, 0.5),
+	'mul': (lambda node: node * node, 0.5),
+	'div': (lambda node: 1 / node, 0.5),
+	'pow': (lambda node: node ** node, 0.5),
+	'neg': (lambda node: -node, 0.5),
+}
+
+# Meta fields that must match for timings to be comparable
+COMPARABLE = ('quick', 'machine', 'platform', 'python', 'numpy')
+
+def measure(fn, repeat=7, min_time=0.05):
+	""" Time of one call to fn over repeat runs of enough calls to
+	take at least min_time, as {'seconds': median, 'spread': ...}.
+	The spread is the interquartile range of the runs relative to
+	the median, a measure of the timing noise.
+	"""
+	timer = timeit.Timer(fn)
+	number = 1
+	while timer.timeit(number) < min_time:
+		number *= 4
+	times = np.array(timer.repeat(repeat=repeat, number=number)) / number
+	median = float(np.median(times))
+	low, high = np.percentile(times, [25, 75])
+	return {'seconds': median, 'spread': float(high - low) / median}
+
+def build_graph(n_vars, n_nodes, sharing):
+	""" A graph of about n_nodes over n_vars variables.
+
+	Each step adds an operator over the previous node and the node
+	sharing steps back, so every node is used by two parents and
+	the reuse spans sharing levels of the graph.
+	"""
+	variables = [Variable('x%d' % i) for i in range(n_vars)]
+	nodes = list(variables)
+	while len(nodes) < n_vars + n_nodes // 3:
+		i = len(nodes)
+		shared = nodes[max(0, i - sharing)]
+		nodes.append(operators.sin(nodes[-1] * variables[i % n_vars]) + shared)
+	return nodes[-1], {var.name: 0.5 for var in variables}
+
+def bench_construction(sizes):
+	results = {}
+	for n_nodes in sizes:
+		result = measure(lambda: build_graph(4, n_nodes, 1))
+		result['nodes'] = n_nodes
+		results['construction/nodes=%d' % n_nodes] = result
+	return results
+
+def bench_modes(sizes, sharings, n_vars=8):
+	results = {}
+	for n_nodes in sizes:
+		for sharing in sharings:
+			graph, inputs = build_graph(n_vars, n_nodes, sharing)
+			for mode in ('forward', 'reverse'):
+				with settings.use_mode(mode):
+					result = measure(lambda: graph.compute(inputs))
+				result['nodes'] = len(graph.compile().nodes)
+				result['sharing'] = sharing
+				results['compute/%s/nodes=%d/sharing=%d' % (mode, n_nodes, sharing)] = result
+	return results
+
+def bench_widths(widths, n_nodes=30):
+	""" Forward mode carries a width by width Jacobian per node, so
+	the graph is kept small enough for wide vectors to fit in memory.
+	"""
+	results = {}
+	graph, inputs = build_graph(2, n_nodes, 4)
+	for width in widths:
+		vector_inputs = {name: np.full(width, value) for name, value in inputs.items()}
+		for mode in ('forward', 'reverse'):
+			with settings.use_mode(mode):
+				result = measure(lambda: graph.compute(vector_inputs))
+			result['width'] = width
+			results['width/%s/width=%d' % (mode, width)] = result
+	return results
+
+def bench_operators(width):
+	results = {}
+	x = Variable('x')
+	for name, (op, value) in OPERATORS.items():
+		graph = op(x)
+		for label, inputs in (('scalar', {'x': value}), ('vector', {'x': np.full(width, value)})):
+			for mode in ('forward', 'reverse'):
+				with settings.use_mode(mode):
+					results['operator/%s/%s/%s' % (name, label, mode)] = measure(lambda: graph.compute(inputs))
+	return results
+
+def bench_fractal(sizes):
+	results = {}
+	x = Variable('x')
+	f = x**3 - 1
+	area = ((-2, 2), (-2, 2))
+	for method, size in sizes:
+		options = {'vectorized': method == 'vectorized', 'adaptive': method == 'adaptive'}
+		result = measure(lambda: fractal_grid(f, size, area, **options))
+		result['pixels_per_second'] = size[0] * size[1] / result['seconds']
+		results['fractal/%s/%dx%d' % ((method,) + size)] = result
+	return results
+
+def run(quick=False):
+	""" All benchmarks, as a dict of name: {'seconds': ..., 'spread': ...}. """
+	if quick:
+		sizes, sharings, widths = [30, 300], [1, 16], [1, 100]
+		fractal_sizes = [('serial', (12, 9)), ('vectorized', (80, 60)), ('adaptive', (80, 60))]
+	else:
+		sizes, sharings, widths = [30, 300, 3000], [1, 4, 16, 64], [1, 10, 100, 1000]
+		fractal_sizes = [('serial', (40, 30)), ('vectorized', (400, 300)), ('adaptive', (400, 300))]
+	results = {}
+	results.update(bench_construction(sizes))
+	results.update(bench_modes(sizes, sharings))
+	results.update(bench_widths(widths))
+	results.update(bench_operators(100))
+	results.update(bench_fractal(fractal_sizes))
+	return results
+
+def compare(results, baseline, threshold, noise=3):
+	""" Ratios of median time against the baseline, and the names of
+	benchmarks slower than the baseline by more than threshold plus
+	noise times the spreads of both runs.
+	"""
+	ratios = {}
+	regressions = []
+	for name, result in results.items():
+		if name not in baseline:
+			continue
+		ratios[name] = result['seconds'] / baseline[name]['seconds']
+		spread = result.get('spread', 0) + baseline[name].get('spread', 0)
+		if ratios[name] > 1 + threshold + noise * spread:
+			regressions.append(name)
+	return ratios, regressions
+
+def mismatches(meta, baseline_meta):
+	""" Fields of meta that differ from those of the baseline. """
+	return [key for key in COMPARABLE if meta.get(key) != baseline_meta.get(key)]
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Time the hot paths of autodiff.')
+	parser.add_argument('--quick', action='store_true', help='smaller sizes, for a fast check')
+	parser.add_argument('--output', help='write the results as JSON to this file')
+	parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+	parser.add_argument('--threshold', type=float, default=0.2,
+						help='relative slowdown reported as a regression (default 0.2)')
+	parser.add_argument('--noise', type=float, default=3,
+						help='multiple of the timing spread added to the threshold (default 3)')
+	args = parser.parse_args(argv)
+
+	report = {
+		'meta': {
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'machine': platform.machine(),
+			'platform': platform.platform(),
+			'quick': args.quick,
+			'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		},
+		'results': run(args.quick),
+	}
+	if args.output:
+		with open(args.output, 'w') as file:
+			json.dump(report, file, indent=1, sort_keys=True)
+
+	regressions = []
+	ratios = {}
+	if args.baseline:
+		with open(args.baseline) as file:
+			baseline = json.load(file)
+		different = mismatches(report['meta'], baseline['meta'])
+		if different:
+			print('warning: baseline differs in %s, timings may not be comparable'
+				  % ', '.join('%s (%s, now %s)' % (key, baseline['meta'].get(key), report['meta'][key])
+							  for key in different), file=sys.stderr)
+		ratios, regressions = compare(report['results'], baseline['results'], args.threshold, args.noise)
+
+	for name, result in report['results'].items():
+		line = '%-48s %12.3f us +-%3.0f%%' % (name, result['seconds'] * 1e6, result['spread'] * 100)
+		if name in ratios:
+			line += '  x%.2f%s' % (ratios[name], '  REGRESSION' if name in regressions else '')
+		print(line)
+	if regressions:
+		print('%d regression(s) beyond %d%%' % (len(regressions), args.threshold * 100))
+	return 1 if regressions else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -1,6 +1,14 @@
+import os
+import math
+import hashlib
+import types
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
+from autodiff.node import Node
+from autodiff.dual import Dual
 
 ''''
 Creates a fractal image
@@ -11,26 +19,35 @@ Parameters:
 f = autodiff function
 area = ((x_min, x_max), (y_min, y_max))
 size = (x_size, y_size)
-diff_method="AD" or "Finite"
+diff_method="AD", "Dual" or "Finite"
 e = Epsilon of iterations
 max_iters = Maximum number of iterations
 alpha = Iterative tuning parameter
+vectorized = Solve the whole grid at once, see fractal_grid
+registry = RootRegistry shared between frames, for stable root labels
+adaptive = Fill uniform regions without solving them, see fractal_grid
 '''
-def create_fractal(f, size, area, diff_method="AD", e=1e-3, max_iters=50, alpha=1,):
-    grid_root, grid_iter, roots = fractal_grid(f, size, area, "Finite", e, max_iters, alpha)
+def create_fractal(f, size, area, diff_method="AD", e=1e-3, max_iters=50, alpha=1, vectorized=False, registry=None,
+                   adaptive=False):
+    grid_root, grid_iter, roots = fractal_grid(f, size, area, diff_method, e, max_iters, alpha, vectorized, registry,
+                                               adaptive)
     image = grid_to_image(grid_root,grid_iter,roots)
     return image
 
 
 # Returns (root, iterations) if converges
+# diff_method="Dual" also accepts f as a plain function of one argument
 def newtons_method(f, z, diff_method = "AD", e=1e-3, max_iters=50, alpha=1):
-    f(x=z)
     for i in range(max_iters):
-        if diff_method == "Finite":
+        if diff_method == "Dual":
+            value, derivative = dual_evaluate(f, z)
+        elif diff_method == "Finite":
             derivative = finite_difference(f,z)
+            value = f.value()
         else:
+            value = f(x=z).value()
             derivative =f.derivative()["x"]
-        zplus = z - alpha*f.value()/derivative
+        zplus = z - alpha*value/derivative
         # Checks for convergence
         if abs(zplus - z) < e:
             return (z, i)
@@ -38,6 +55,17 @@ def newtons_method(f, z, diff_method = "AD", e=1e-3, max_iters=50, alpha=1):
     return None
 
 
+# Returns (value, derivative) of f at z from one dual number evaluation
+def dual_evaluate(f, z):
+    if isinstance(f, Node):
+        result = f.compile().evaluate({"x": Dual(z, 1)})[-1]
+    else:
+        result = f(Dual(z, 1))
+    if isinstance(result, Dual):
+        return result.value(), result.derivative()
+    return result, 0
+
+
 def finite_difference(f, z, epsilon=1e-3):
     return (f(x=(z+epsilon)).value() - f(x=z).value()) / epsilon
 
@@ -53,38 +81,280 @@ size = (x_size, y_size)
 e = Epsilon of iterations
 max_iters = Maximum number of iterations
 alpha = Iterative tuning parameter
+vectorized = Run Newton's method on the whole grid as one array, with
+             derivatives from one batched AD evaluation per iteration
+             (diff_method is then ignored)
+registry = RootRegistry to label roots with, a new one when None
+adaptive = Vectorized, but only solving pixels near basin boundaries,
+           see solve_adaptive (diff_method is then ignored)
+'''
+def fractal_grid(f, size, area, diff_method="AD", e=1e-3, max_iters=50, alpha=1, vectorized=False, registry=None,
+                 adaptive=False):
+    if adaptive:
+        grid_value, grid_iter = solve_adaptive(f, size, area, e, max_iters, alpha)
+    elif vectorized:
+        grid_value, grid_iter = solve_grid(f, size, area, e, max_iters, alpha)
+    else:
+        grid_value, grid_iter = solve_rows(f, size, area, (0, size[1]), diff_method, e, max_iters, alpha)
+    grid_root, roots = label_roots(grid_value, e, registry)
+    return (grid_root, grid_iter, roots)
+
 '''
-def fractal_grid(f, size, area, diff_method="AD", e=1e-3, max_iters=50, alpha=1, ):
+Runs Newton's method on the rows [start, stop) of the grid
+
+Returns (array_of_root_values, array_of_iterations) for those rows,
+with NaN where Newton's method did not converge.
+'''
+def solve_rows(f, size, area, rows, diff_method="AD", e=1e-3, max_iters=50, alpha=1):
     # Parameters
-    roots = []
     ((x_min, x_max), (y_min, y_max)) = area
     (x_size, y_size) = size
+    (start, stop) = rows
 
     # Outputs
-    grid_root = np.zeros((y_size, x_size))
-    grid_iter = np.zeros((y_size, x_size))
+    grid_value = np.full((stop - start, x_size), np.nan, dtype=complex)
+    grid_iter = np.zeros((stop - start, x_size))
 
     # Grid calculations over complex plane
-    for y in (range(y_size)):
+    for y in range(start, stop):
         z_y = y * (y_max - y_min)/(y_size - 1) + y_min
         for x in range(x_size):
             z_x = x * (x_max - x_min)/(x_size - 1) + x_min
-            found = newtons_method(f, complex(z_x, z_y), diff_method, e, max_iters)
+            found = newtons_method(f, complex(z_x, z_y), diff_method, e, max_iters, alpha)
             if found:
-                root, iters = found
+                grid_value[y - start, x], grid_iter[y - start, x] = found
+
+    return (grid_value, grid_iter)
+
+'''
+Runs Newton's method on the whole grid at once
+
+Every iteration evaluates f and its derivative at all pixels still
+active in one batched call, compute_batch for autodiff graphs or a
+dual number evaluation for plain functions. Pixels are frozen once
+they converge, with the same test and results as newtons_method.
+
+Returns (array_of_root_values, array_of_iterations), as solve_rows
+'''
+def solve_grid(f, size, area, e=1e-3, max_iters=50, alpha=1):
+    z = grid_points(size, area)
+    grid_value, grid_iter = solve_points(f, z.ravel(), e, max_iters, alpha)
+    return (grid_value.reshape(z.shape), grid_iter.reshape(z.shape))
+
+'''
+Runs Newton's method adaptively, in the style of Mariani-Silver
+
+Starts from the whole grid as one tile. The border pixels of every
+tile are solved; when they all converge to the same root in the same
+number of iterations, the interior is filled with that result without
+solving it. Other tiles are split in four, down to min_tile pixels a
+side, below which every pixel is solved. Each round solves the pixels
+of all its tiles in one vectorized call.
+
+Large uniform basins then cost only their borders. Iterations equal
+those of solve_grid, and roots agree within e, unless a tile with a
+uniform border hides a different root or iteration band inside it.
+Filled pixels hold a border root, so near duplicate roots can label
+differently than with solve_grid.
+
+Returns (array_of_root_values, array_of_iterations), as solve_rows
+'''
+def solve_adaptive(f, size, area, e=1e-3, max_iters=50, alpha=1, min_tile=8):
+    z = grid_points(size, area)
+    grid_value = np.full(z.shape, np.nan, dtype=complex)
+    grid_iter = np.zeros(z.shape)
+    solved = np.zeros(z.shape, dtype=bool)
+
+    # Tiles as inclusive pixel bounds (y0, x0, y1, x1)
+    tiles = [(0, 0, z.shape[0] - 1, z.shape[1] - 1)]
+    while tiles:
+        # Solve the borders of small tiles' interiors and of all others
+        need = np.zeros(z.shape, dtype=bool)
+        for (y0, x0, y1, x1) in tiles:
+            if min(y1 - y0, x1 - x0) <= min_tile:
+                need[y0:y1 + 1, x0:x1 + 1] = True
+            else:
+                need[y0, x0:x1 + 1] = need[y1, x0:x1 + 1] = True
+                need[y0:y1 + 1, x0] = need[y0:y1 + 1, x1] = True
+        need &= ~solved
+        grid_value[need], grid_iter[need] = solve_points(f, z[need], e, max_iters, alpha)
+        solved |= need
+
+        next_tiles = []
+        for (y0, x0, y1, x1) in tiles:
+            if min(y1 - y0, x1 - x0) <= min_tile:
+                continue
+            border_value = np.concatenate([grid_value[y0, x0:x1 + 1], grid_value[y1, x0:x1 + 1],
+                                           grid_value[y0:y1 + 1, x0], grid_value[y0:y1 + 1, x1]])
+            border_iter = np.concatenate([grid_iter[y0, x0:x1 + 1], grid_iter[y1, x0:x1 + 1],
+                                          grid_iter[y0:y1 + 1, x0], grid_iter[y0:y1 + 1, x1]])
+            if (not np.isnan(border_value).any() and np.all(np.abs(border_value - border_value[0]) < e)
+                    and np.all(border_iter == border_iter[0])):
+                interior = (slice(y0 + 1, y1), slice(x0 + 1, x1))
+                grid_value[interior] = border_value[0]
+                grid_iter[interior] = border_iter[0]
+                solved[interior] = True
+            else:
+                y_mid = (y0 + y1) // 2
+                x_mid = (x0 + x1) // 2
+                next_tiles += [(y0, x0, y_mid, x_mid), (y0, x_mid, y_mid, x1),
+                               (y_mid, x0, y1, x_mid), (y_mid, x_mid, y1, x1)]
+        tiles = next_tiles
 
-                flag = False
-                for test_root in roots:
-                    if abs(test_root - root) < e:
-                        root = test_root
-                        flag = True
+    return (grid_value, grid_iter)
+
+# Complex coordinates of every pixel, shaped (y_size, x_size)
+def grid_points(size, area):
+    ((x_min, x_max), (y_min, y_max)) = area
+    (x_size, y_size) = size
+    z_x = np.arange(x_size) * (x_max - x_min)/(x_size - 1) + x_min
+    z_y = np.arange(y_size) * (y_max - y_min)/(y_size - 1) + y_min
+    return z_x[np.newaxis, :] + 1j * z_y[:, np.newaxis]
+
+# Vectorized Newton's method from every starting point of the array z
+def solve_points(f, z, e=1e-3, max_iters=50, alpha=1):
+    z = np.array(z, dtype=complex)
+    grid_value = np.full(z.shape, np.nan, dtype=complex)
+    grid_iter = np.zeros(z.shape)
+    active = np.arange(z.size)
+
+    with np.errstate(all='ignore'):
+        for i in range(max_iters):
+            if active.size == 0:
+                break
+            value, derivative = batch_evaluate(f, z[active])
+            zplus = z[active] - alpha*value/derivative
+            converged = np.abs(zplus - z[active]) < e
+            grid_value[active[converged]] = z[active[converged]]
+            grid_iter[active[converged]] = i
+            z[active] = zplus
+            # Pixels gone to NaN can never converge
+            active = active[~converged & ~np.isnan(zplus)]
+
+    return (grid_value, grid_iter)
+
+# Returns (values, derivatives) of f at every point of the array z
+def batch_evaluate(f, z):
+    if isinstance(f, Node):
+        value, derivative = f.compute_batch({"x": z})
+        return value, derivative["x"]
+    return dual_evaluate(f, z)
+
+'''
+Registry of the roots found so far
+
+Roots closer than e are considered the same root. Each root is hashed
+by the cell of a grid of width e it falls in, so a lookup only checks
+the 3x3 cells around it, in O(1) amortized time instead of a scan over
+all roots. Among the roots within e the first one found wins, as in a
+linear scan. Reusing a registry across tiles or frames keeps labels
+stable.
+'''
+class RootRegistry():
+    def __init__(self, e):
+        self.e = e
+        self.roots = []
+        self.cells = {}
+
+    def cell(self, root):
+        return (math.floor(root.real / self.e), math.floor(root.imag / self.e))
+
+    # Label of root, starting at 1, registering it if it is new
+    def label(self, root):
+        (cell_x, cell_y) = self.cell(root)
+        found = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for idx in self.cells.get((cell_x + dx, cell_y + dy), ()):
+                    if found is not None and idx > found:
+                        break
+                    if abs(self.roots[idx] - root) < self.e:
+                        found = idx
                         break
-                if not flag:
-                    roots.append(root)
+        if found is None:
+            found = len(self.roots)
+            self.roots.append(root)
+            self.cells.setdefault((cell_x, cell_y), []).append(found)
+        return found + 1
+
+    # Labels of an array of roots, the same as calling label on each in
+    # turn. Known roots, then each new root in order, claim the unlabeled
+    # values within e in the 3x3 cells around them. Roots are at least e
+    # apart, so each value is only checked by a bounded number of roots.
+    def label_all(self, values):
+        labels = np.zeros(values.shape, dtype=int)
+        if values.size == 0:
+            return labels
+        # Cells as complex numbers, x + iy, to group values by cell
+        value_cells = np.floor(values.real / self.e) + 1j * np.floor(values.imag / self.e)
+        cells, inverse, counts = np.unique(value_cells, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(counts)
+        members = {(int(cell.real), int(cell.imag)): order[stop - count:stop]
+                   for cell, stop, count in zip(cells, bounds, counts)}
+
+        def claim(idx):
+            root = self.roots[idx]
+            (cell_x, cell_y) = self.cell(root)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    near = members.get((cell_x + dx, cell_y + dy))
+                    if near is None:
+                        continue
+                    near = near[labels[near] == 0]
+                    labels[near[np.abs(values[near] - root) < self.e]] = idx + 1
+
+        for idx in range(len(self.roots)):
+            claim(idx)
+        for position in range(values.size):
+            if labels[position] == 0:
+                claim(self.label(values[position]) - 1)
+        return labels
+
+'''
+Labels converged pixels by root, starting at 1
+
+Pixels are visited row by row. A root closer than e to one already
+found shares its label, others are added to the registry, a new one
+unless given.
+
+Returns (array_of_roots, roots_found)
+'''
+def label_roots(grid_value, e, registry=None):
+    registry = registry or RootRegistry(e)
+    grid_root = np.zeros(grid_value.shape)
+    converged = ~np.isnan(grid_value)
+    grid_root[converged] = registry.label_all(grid_value[converged])
+    return (grid_root, registry.roots)
+
+'''
+Fractal grid rendered in parallel
+
+Splits the grid into blocks of rows and runs Newton's method on them
+in a process pool. Roots are then labeled over the merged grid in
+one pass, so the output is the same as fractal_grid. f must be
+picklable, which autodiff graphs are.
+
+Parameters, beyond those of fractal_grid:
+workers = Number of processes, all cores when None
+block_rows = Rows per block, by default four blocks per worker
+registry = RootRegistry to label roots with, a new one when None
+'''
+def fractal_grid_parallel(f, size, area, diff_method="AD", e=1e-3, max_iters=50, alpha=1,
+                          workers=None, block_rows=None, registry=None):
+    y_size = size[1]
+    workers = workers or os.cpu_count() or 1
+    block_rows = block_rows or max(1, -(-y_size // (4 * workers)))
+    blocks = [(start, min(start + block_rows, y_size)) for start in range(0, y_size, block_rows)]
 
-                grid_root[y,x] = roots.index(root)+1
-                grid_iter[y,x] = iters
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(solve_rows, f, size, area, rows, diff_method, e, max_iters, alpha)
+                   for rows in blocks]
+        tiles = [future.result() for future in futures]
 
+    grid_value = np.vstack([tile[0] for tile in tiles])
+    grid_iter = np.vstack([tile[1] for tile in tiles])
+    grid_root, roots = label_roots(grid_value, e, registry)
     return (grid_root, grid_iter, roots)
 
 '''
@@ -118,4 +388,214 @@ def save_video(frames, filename, display=True):
     ani = animation.ArtistAnimation(fig, ims, interval=50, blit=True)
     if display:
         plt.show()
-    ani.save(filename)
\ No newline at end of file
+    ani.save(filename)
+
+'''
+Generates fractal images lazily, one per area
+
+Frames share one RootRegistry, so a root keeps its label across the
+whole sequence. Only the current frame is held in memory.
+'''
+def fractal_frames(f, size, areas, diff_method="AD", e=1e-3, max_iters=50, alpha=1, vectorized=False, registry=None):
+    registry = registry or RootRegistry(e)
+    for area in areas:
+        yield create_fractal(f, size, area, diff_method, e, max_iters, alpha, vectorized, registry)
+
+'''
+Function that encodes frames into a video file one at a time
+
+Unlike save_video, frames may be any iterable, such as fractal_frames,
+and each is released once encoded, so memory does not grow with the
+length of the video. writer defaults to ffmpeg.
+'''
+def stream_video(frames, filename, fps=20, writer=None, dpi=100):
+    writer = writer or animation.FFMpegWriter(fps=fps)
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No frames to encode")
+    fig = plt.figure()
+    im = plt.imshow(first)
+    with writer.saving(fig, filename, dpi):
+        writer.grab_frame()
+        for frame in frames:
+            im.set_data(frame)
+            im.autoscale()
+            writer.grab_frame()
+    plt.close(fig)
+
+'''
+Function that writes frames to a memory-mapped .npy stack
+
+The stack of shape (n_frames, y_size, x_size) is written frame by
+frame, so memory use is constant in the number of frames. Load it
+back with np.load(filename, mmap_mode="r").
+'''
+def save_frames(frames, filename, n_frames):
+    stack = None
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        if stack is None:
+            stack = np.lib.format.open_memmap(filename, mode="w+", dtype=frame.dtype, shape=(n_frames,) + frame.shape)
+        stack[count - 1] = frame
+        if count == n_frames:
+            break
+    if count < n_frames:
+        raise ValueError("Expected %d frames, got %d" % (n_frames, count))
+    stack.flush()
+    del stack
+
+'''
+Stable key of a function for caching
+
+Autodiff graphs are keyed by their structure, node types, constants
+and variable names. Plain functions are keyed by their name and
+bytecode, and by the values in their closure and the globals they
+use, so closures over different values get different keys.
+'''
+def function_key(f):
+    return hashlib.sha1(repr(key_parts(f, set())).encode()).hexdigest()
+
+# Names of the globals code uses, including in nested functions
+def code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= code_names(const)
+    return names
+
+# Stable description of a value a function depends on, seen holds the
+# ids of functions being described, to stop at recursive references
+def key_parts(value, seen):
+    if isinstance(value, Node):
+        tape = value.compile()
+        return [(node.type, type(node).__name__, tape.children[idx], getattr(node, "name", None),
+                 key_parts(node.value(), seen) if node.type == "Constant" else None)
+                for idx, node in enumerate(tape.nodes)]
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, hashlib.sha1(value.tobytes()).hexdigest())
+    if isinstance(value, types.ModuleType):
+        return value.__name__
+    if isinstance(value, types.CodeType):
+        return (value.co_code, tuple(key_parts(const, seen) for const in value.co_consts))
+    if isinstance(value, (list, tuple)):
+        return tuple(key_parts(item, seen) for item in value)
+    code = getattr(value, "__code__", None)
+    if code is None:
+        return repr(value)
+    if id(value) in seen:
+        return value.__qualname__
+    seen.add(id(value))
+    cells = [key_parts(cell.cell_contents, seen) for cell in value.__closure__ or ()]
+    names = [(name, key_parts(value.__globals__[name], seen))
+             for name in sorted(code_names(code)) if name in value.__globals__]
+    return (value.__module__, value.__qualname__, key_parts(code, seen), cells, names)
+
+'''
+LRU cache of solved fractal grids
+
+Grids are keyed by function, size, area, e, max_iters and alpha, and
+for warm started grids by the area of the frame they started from. The
+maxsize most recently used stay in memory; with a directory, every
+grid is also saved there as .npz and reloaded on a memory miss.
+'''
+class TileCache():
+    def __init__(self, maxsize=64, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.tiles = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, f, size, area, e, max_iters, alpha, warm_from=None):
+        parts = (function_key(f), size, area, e, max_iters, alpha, warm_from)
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    # Returns (grid_value, grid_iter), or None on a miss
+    def get(self, key):
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        if self.directory is not None and os.path.exists(self.path(key)):
+            with np.load(self.path(key)) as data:
+                tile = (data["grid_value"], data["grid_iter"])
+            self.put(key, tile, save=False)
+            return tile
+        return None
+
+    def put(self, key, tile, save=True):
+        self.tiles[key] = tile
+        self.tiles.move_to_end(key)
+        while len(self.tiles) > self.maxsize:
+            self.tiles.popitem(last=False)
+        if save and self.directory is not None:
+            np.savez(self.path(key), grid_value=tile[0], grid_iter=tile[1])
+
+'''
+Generates the frames of a zoom sequence, reusing work between frames
+
+Frames are solved with the vectorized solver and cached in a
+TileCache, so rendering a sequence again costs no Newton iterations.
+Warm started grids are cached apart from cold ones, so a cold render
+never reuses them.
+With warm_start, a pixel that falls inside the previous frame, where
+the four surrounding previous pixels converged to the same root in the
+same number of iterations, takes that root and iteration count instead
+of being solved. Pixels near basin boundaries or iteration bands, and
+outside the previous frame, are solved. The result can only differ
+from a cold render where structure is finer than the previous frame's
+pixels.
+
+Returns a generator of images, as fractal_frames
+'''
+def zoom_frames(f, size, areas, e=1e-3, max_iters=50, alpha=1, cache=None, warm_start=True, registry=None):
+    registry = registry or RootRegistry(e)
+    cache = cache if cache is not None else TileCache()
+    previous = None
+    previous_area = None
+    for area in areas:
+        key = cache.key(f, size, area, e, max_iters, alpha)
+        tile = cache.get(key)
+        if tile is None and warm_start and previous is not None:
+            # A cold grid is exact, so it serves warm renders too
+            key = cache.key(f, size, area, e, max_iters, alpha, warm_from=previous_area)
+            tile = cache.get(key)
+            if tile is None:
+                tile = warm_solve(f, grid_points(size, area), previous, e, max_iters, alpha)
+                cache.put(key, tile)
+        elif tile is None:
+            tile = solve_grid(f, size, area, e, max_iters, alpha)
+            cache.put(key, tile)
+        grid_value, grid_iter = tile
+        grid_root, roots = label_roots(grid_value, e, registry)
+        previous = (grid_points(size, area), grid_value, grid_iter, grid_root)
+        previous_area = area
+        yield grid_to_image(grid_root, grid_iter, roots)
+
+# Solves the pixels z, copying results from the previous frame where it is uniform
+def warm_solve(f, z, previous, e, max_iters, alpha):
+    (prev_z, prev_value, prev_iter, prev_root) = previous
+    (y_size, x_size) = prev_z.shape
+    # Fractional pixel position of z in the previous frame
+    x_pos = (z.real - prev_z[0, 0].real) / (prev_z[0, -1].real - prev_z[0, 0].real) * (x_size - 1)
+    y_pos = (z.imag - prev_z[0, 0].imag) / (prev_z[-1, 0].imag - prev_z[0, 0].imag) * (y_size - 1)
+    inside = (x_pos >= 0) & (x_pos <= x_size - 1) & (y_pos >= 0) & (y_pos <= y_size - 1)
+
+    x0 = np.clip(np.floor(x_pos).astype(int), 0, x_size - 2)
+    y0 = np.clip(np.floor(y_pos).astype(int), 0, y_size - 2)
+    corners = [(y0, x0), (y0, x0 + 1), (y0 + 1, x0), (y0 + 1, x0 + 1)]
+    uniform = inside & (prev_root[y0, x0] > 0)
+    for corner in corners[1:]:
+        uniform &= (prev_root[corner] == prev_root[y0, x0]) & (prev_iter[corner] == prev_iter[y0, x0])
+
+    nearest_x = np.clip(np.rint(x_pos).astype(int), 0, x_size - 1)
+    nearest_y = np.clip(np.rint(y_pos).astype(int), 0, y_size - 1)
+    grid_value = np.where(uniform, prev_value[nearest_y, nearest_x], np.nan + 0j)
+    grid_iter = np.where(uniform, prev_iter[nearest_y, nearest_x], 0)
+
+    solve = ~uniform
+    grid_value[solve], grid_iter[solve] = solve_points(f, z[solve], e, max_iters, alpha)
+    return (grid_value, grid_iter)
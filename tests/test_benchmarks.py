@@ -0,0 +1,29 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_suite import compare, mismatches
+
+def test_compare():
+    baseline = {"a": {"seconds": 1.0, "spread": 0.01},
+                "b": {"seconds": 1.0, "spread": 0.01},
+                "c": {"seconds": 1.0, "spread": 0.1},
+                "d": {"seconds": 1.0}}
+    results = {"a": {"seconds": 1.1, "spread": 0.01},
+               "b": {"seconds": 1.5, "spread": 0.01},
+               "c": {"seconds": 1.5, "spread": 0.1},
+               "d": {"seconds": 1.3, "spread": 0.0},
+               "new": {"seconds": 9.0, "spread": 0.0}}
+    ratios, regressions = compare(results, baseline, 0.2)
+    assert (ratios == pytest.approx({"a": 1.1, "b": 1.5, "c": 1.5, "d": 1.3}))
+    # c is as slow as b, but within its noise
+    assert (regressions == ["b", "d"])
+    assert (compare(results, baseline, 0.2, noise=0)[1] == ["b", "c", "d"])
+    assert (compare(results, baseline, 0.6)[1] == [])
+
+def test_mismatches():
+    meta = {"quick": True, "machine": "x86_64", "platform": "Linux", "python": "3.11", "numpy": "2.0"}
+    assert (mismatches(meta, dict(meta)) == [])
+    assert (mismatches(meta, dict(meta, quick=False, machine="arm64")) == ["quick", "machine"])
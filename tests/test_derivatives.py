@@ -0,0 +1,103 @@
+import pytest
+import numpy as np
+from autodiff.node import *
+from autodiff.operators import *
+from autodiff.derivatives import *
+
+def test_jacobian_result():
+    x = Variable("x")
+    y = Variable("y")
+    shared = x * y
+    f1 = shared + sin(x)
+    f2 = exp(shared)
+    f3 = y**2
+    expected = np.array([[2 + np.cos(1), 1],
+                         [2 * np.exp(2), np.exp(2)],
+                         [0, 4]])
+    for mode in [None, "forward", "reverse"]:
+        result = jacobian([f1, f2, f3], {"x": 1, "y": 2}, mode)
+        assert (result.shape == (3, 2))
+        assert (np.allclose(result, expected))
+
+def test_jacobian_vector():
+    a = Variable("a")
+    b = Variable("b")
+    test_arr = np.array([0.5, 1, 2])
+    f = sin(a) * b
+    g = b * 3
+    expected = np.vstack([np.hstack([np.diag(2*np.cos(test_arr)), np.sin(test_arr)[:, None]]),
+                          [[0, 0, 0, 3]]])
+    forward = jacobian([f, g], {"a": test_arr, "b": 2}, "forward")
+    reverse = jacobian([f, g], {"a": test_arr, "b": 2}, "reverse")
+    assert (forward.shape == (4, 4))
+    assert (np.allclose(forward, expected))
+    assert (np.allclose(reverse, expected))
+    # Single output node
+    assert (np.allclose(jacobian(g, {"b": 2}), [[3]]))
+
+def test_jacobian_errors():
+    x = Variable("x")
+    y = Variable("y")
+    with pytest.raises(TypeError):
+        jacobian([x * y], {"x": 1})
+    with pytest.raises(ValueError):
+        jacobian([x * y], {"x": 1, "y": 2}, "sideways")
+    with pytest.raises(TypeError):
+        Tape([x, y])(x = 1, y = 2)
+
+def test_hessian_result():
+    x = Variable("x")
+    y = Variable("y")
+    f = x**2 * y + exp(x * y)
+    inputs = {"x": 1., "y": 2.}
+    e = np.exp(2)
+    expected = np.array([[2*2 + 4*e, 2*1 + e + 2*e],
+                         [2*1 + e + 2*e, e]])
+    result = hessian(f, inputs)
+    assert (result.shape == (2, 2))
+    assert (np.allclose(result, expected))
+    v = np.array([0.3, -1.2])
+    assert (np.allclose(hvp(f, inputs, v), expected @ v))
+
+def test_hessian_vector():
+    a = Variable("a")
+    b = Variable("b")
+    test_arr = np.array([0.5, 1, 2])
+    # Vector outputs are summed
+    f = sin(a) * b + b**3
+    inputs = {"a": test_arr, "b": 2.}
+    expected = np.zeros((4, 4))
+    expected[:3, :3] = np.diag(-2*np.sin(test_arr))
+    expected[:3, 3] = expected[3, :3] = np.cos(test_arr)
+    expected[3, 3] = 3 * 6 * 2
+    assert (np.allclose(hessian(f, inputs), expected))
+    v = np.array([1., 0., -1., 0.5])
+    assert (np.allclose(hvp(f, inputs, v), expected @ v))
+
+def test_hessian_errors():
+    x = Variable("x")
+    f = x**3
+    with pytest.raises(TypeError):
+        hessian(f, {"y": 1})
+    with pytest.raises(TypeError):
+        hvp(f, {"y": 1}, [1])
+    with pytest.raises(ValueError):
+        hvp(f, {"x": 1}, [1, 2])
+
+def test_hessian_operators():
+    x = Variable("x")
+    h = 1e-5
+    for op in [sin, cos, tan, exp, sqrt, log, arcsin, arccos, arctan, sinh, cosh, tanh, logistic]:
+        f = op(x) / x
+        def grad(point):
+            return jacobian(f, {"x": point}, "reverse")[0, 0]
+        expected = (grad(0.3 + h) - grad(0.3 - h)) / (2*h)
+        assert (np.isclose(hessian(f, {"x": 0.3})[0, 0], expected, rtol=1e-4))
+    # Powers with a varying exponent, through positive_log
+    y = Variable("y")
+    point = {"x": 1.5, "y": 0.7}
+    assert (np.isclose(hessian(x**x, {"x": 1.5})[0, 0], 1.5**1.5 * ((np.log(1.5) + 1)**2 + 1 / 1.5)))
+    expected = [[0.7 * -0.3 * 1.5**-1.3, 1.5**-0.3 * (1 + 0.7 * np.log(1.5))],
+                [1.5**-0.3 * (1 + 0.7 * np.log(1.5)), np.log(1.5)**2 * 1.5**0.7]]
+    assert (np.allclose(hessian(x**y, point), expected))
+    assert (np.isclose(hessian(2**x, {"x": 1.5})[0, 0], 2**1.5 * np.log(2)**2))
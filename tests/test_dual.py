@@ -0,0 +1,47 @@
+import pytest
+import numpy as np
+from autodiff.node import *
+from autodiff.operators import *
+from autodiff.dual import *
+from autodiff.settings import *
+
+def test_dual_arithmetic():
+    x = Dual(3., 1)
+    y = (2*x + 1) * x - x / 4 + 6 / x - x**2 + 2**x
+    assert (np.isclose(y.value(), 2*9 + 3 - 0.75 + 2 - 9 + 8))
+    assert (np.isclose(y.derivative(), 4*3 + 1 - 0.25 - 6/9 - 6 + 8*np.log(2)))
+    z = -x ** x
+    assert (np.isclose(z.value(), -27))
+    assert (np.isclose(z.derivative(), -27 * (np.log(3) + 1)))
+    assert (Dual(2.).derivative() == 0)
+
+def test_dual_matches_nodes():
+    settings.set_mode("forward")
+    functions = [exp, sqrt, sin, cos, tan, arcsin, arccos, arctan, sinh, cosh, tanh, logistic, log,
+                 lambda t: log(t, 10)]
+    for function in functions:
+        v = Variable("v")
+        node = function(v * 2) / v
+        node(v = 0.3)
+        dual = function(Dual(0.3, 1) * 2) / Dual(0.3, 1)
+        assert (isinstance(dual, Dual))
+        assert (np.isclose(dual.value(), node.value()))
+        assert (np.isclose(dual.derivative(), node.derivative()["v"]))
+
+def test_dual_vector():
+    test_arr = np.array([0.5, 1.5])
+    x = Dual(test_arr, np.ones(2))
+    y = sin(x) * x
+    assert (np.allclose(y.value(), np.sin(test_arr) * test_arr))
+    assert (np.allclose(y.derivative(), np.cos(test_arr) * test_arr + np.sin(test_arr)))
+
+def test_dual_complex():
+    z = Dual(complex(1, 1), 1)
+    y = z**3 - 1
+    assert (np.isclose(y.value(), complex(1, 1)**3 - 1))
+    assert (np.isclose(y.derivative(), 3 * complex(1, 1)**2))
+
+def test_dual_slots():
+    x = Dual(1., 1)
+    with pytest.raises(AttributeError):
+        x.other = 1
@@ -1,3 +1,4 @@
+import sys
 import pytest
 from examples.fractals import *
 from autodiff.node import *
@@ -7,3 +8,135 @@ def test_newtons_method():
   f = x + 1
   assert(newtons_method(f, -1)[0] == -1.0)
   assert(round(newtons_method(f,0.5, "Finite")[0],2) == -1.0)
+
+def test_newtons_method_dual():
+  x = Variable("x")
+  f = x**3 - 1
+  root, iters = newtons_method(f, complex(-1, 1), "Dual")
+  assert(abs(root**3 - 1) < 1e-2)
+  assert(newtons_method(f, complex(-1, 1), "AD")[0] == root)
+  root, iters = newtons_method(lambda z: z**3 - 1, complex(-1, 1), "Dual")
+  assert(abs(root**3 - 1) < 1e-2)
+
+def test_fractal_grid_parallel():
+  x = Variable("x")
+  f = x**3 - 1
+  area = ((-1, 1), (-1, 1))
+  grid_root, grid_iter, roots = fractal_grid(f, (12, 9), area, "Dual")
+  assert(len(roots) >= 3 and all(abs(root**3 - 1) < 1e-2 for root in roots))
+  assert(grid_root.max() == len(roots))
+  parallel = fractal_grid_parallel(f, (12, 9), area, "Dual", workers=2, block_rows=2)
+  assert(np.array_equal(parallel[0], grid_root))
+  assert(np.array_equal(parallel[1], grid_iter))
+  assert(parallel[2] == roots)
+
+def test_fractal_grid_vectorized():
+  x = Variable("x")
+  area = ((-2, 2), (-2, 2))
+  for f in [x**3 - 1, lambda z: z**3 - 1]:
+    grid_root, grid_iter, roots = fractal_grid(f, (14, 10), area, "Dual")
+    vectorized = fractal_grid(f, (14, 10), area, vectorized=True)
+    assert(np.array_equal(vectorized[0], grid_root))
+    assert(np.array_equal(vectorized[1], grid_iter))
+    assert(len(vectorized[2]) == len(roots))
+  image = create_fractal(x**3 - 1, (14, 10), area, "Dual")
+  assert(np.array_equal(image, create_fractal(x**3 - 1, (14, 10), area, vectorized=True)))
+
+def test_root_registry():
+  registry = RootRegistry(0.1)
+  roots = [0.05, 0.12, 0.5, 0.21, 0.125, 0.999 + 0.3j, 1.05 + 0.31j, -0.03]
+  # Same labels as a linear scan keeping the first root within e
+  found = []
+  for root in roots:
+    for idx, test_root in enumerate(found):
+      if abs(test_root - root) < 0.1:
+        label = idx + 1
+        break
+    else:
+      found.append(root)
+      label = len(found)
+    assert(registry.label(root) == label)
+  assert(registry.roots == found)
+  # Labeling an array at once gives the same labels
+  values = np.random.RandomState(0).uniform(-0.5, 0.5, 400) + 1j * np.random.RandomState(1).uniform(-0.5, 0.5, 400)
+  single = RootRegistry(0.1)
+  expected = [single.label(value) for value in values]
+  batch = RootRegistry(0.1)
+  batch.label(0.3j)
+  single_known = RootRegistry(0.1)
+  single_known.label(0.3j)
+  assert(list(RootRegistry(0.1).label_all(values)) == expected)
+  assert(list(batch.label_all(values)) == [single_known.label(value) for value in values])
+  assert(batch.roots == single_known.roots)
+
+def test_fractal_grid_registry():
+  x = Variable("x")
+  registry = RootRegistry(1e-3)
+  first = fractal_grid(x**3 - 1, (14, 10), ((-2, 2), (-2, 2)), vectorized=True, registry=registry)
+  second = fractal_grid(x**3 - 1, (14, 10), ((-1, 2), (-2, 1)), vectorized=True, registry=registry)
+  assert(first[2] is second[2])
+  for label in np.unique(second[0][second[0] > 0]):
+    assert(abs(registry.roots[int(label) - 1]**3 - 1) < 1e-2)
+
+def test_streaming_frames(tmp_path):
+  x = Variable("x")
+  areas = [((-2 / k, 2 / k), (-2 / k, 2 / k)) for k in (1, 2, 3)]
+  frames = fractal_frames(x**3 - 1, (14, 10), areas, vectorized=True)
+  assert(not isinstance(frames, list))
+  save_frames(frames, tmp_path / "frames.npy", 3)
+  stack = np.load(tmp_path / "frames.npy", mmap_mode="r")
+  assert(stack.shape == (3, 10, 14))
+  assert(np.array_equal(stack[0], create_fractal(x**3 - 1, (14, 10), areas[0], vectorized=True)))
+  with pytest.raises(ValueError):
+    save_frames(fractal_frames(x**3 - 1, (14, 10), areas, vectorized=True), tmp_path / "more.npy", 4)
+  frames = fractal_frames(x**3 - 1, (14, 10), areas, vectorized=True)
+  stream_video(frames, tmp_path / "zoom.gif", writer=animation.PillowWriter(fps=5))
+  assert((tmp_path / "zoom.gif").stat().st_size > 0)
+  with pytest.raises(ValueError):
+    stream_video(iter([]), tmp_path / "empty.gif", writer=animation.PillowWriter(fps=5))
+
+def test_zoom_frames(tmp_path):
+  x = Variable("x")
+  f = x**3 - 1
+  areas = [((-2 * 0.9**k, 2 * 0.9**k), (-2 * 0.9**k, 2 * 0.9**k)) for k in range(4)]
+  cold = list(fractal_frames(f, (40, 30), areas, vectorized=True))
+  cache = TileCache(maxsize=2, directory=tmp_path)
+  warm = list(zoom_frames(f, (40, 30), areas, cache=cache))
+  assert(all(np.mean(a != b) < 0.01 for a, b in zip(cold, warm)))
+  assert(np.array_equal(cold[0], warm[0]))
+  assert(list(zoom_frames(f, (40, 30), areas, cache=TileCache(), warm_start=False))[3].shape == (30, 40))
+  # Only the last two grids stay in memory, all are on disk
+  assert(len(cache.tiles) == 2 and len(list(tmp_path.glob("*.npz"))) == 4)
+  key = cache.key(f, (40, 30), areas[0], 1e-3, 50, 1)
+  assert(key not in cache.tiles and cache.get(key) is not None)
+  again = list(zoom_frames(x**3 - 1, (40, 30), areas, cache=TileCache(directory=tmp_path)))
+  assert(all(np.array_equal(a, b) for a, b in zip(again, warm)))
+  assert(function_key(x**3 - 1) == function_key(f) != function_key(x**3 - 2))
+  # Cold renders never reuse warm started grids
+  assert(all(np.array_equal(a, b) for a, b in zip(cold, zoom_frames(f, (40, 30), areas, cache=cache, warm_start=False))))
+
+def test_solve_adaptive():
+  x = Variable("x")
+  for area in [((-2, 2), (-2, 2)), ((0.5, 1.5), (-0.5, 0.5))]:
+    grid_value, grid_iter = solve_grid(x**3 - 1, (80, 60), area, 1e-3, 50, 1)
+    value, iters = solve_adaptive(x**3 - 1, (80, 60), area)
+    assert(np.array_equal(iters, grid_iter))
+    assert(np.all(np.abs(value - grid_value) < 1e-3))
+  # Tiles no larger than min_tile are solved pixel by pixel
+  value, iters = solve_adaptive(x**3 - 1, (14, 10), area, min_tile=20)
+  assert(np.array_equal(value, solve_grid(x**3 - 1, (14, 10), area, 1e-3, 50, 1)[0]))
+  grid_root, grid_iter, roots = fractal_grid(x**3 - 1, (80, 60), area, adaptive=True)
+  assert(grid_root.shape == (60, 80) and len(roots) > 0)
+
+POWER = 3
+
+def power_minus_one(z):
+  return z**POWER - 1
+
+def test_function_key(monkeypatch):
+  make = lambda n: (lambda z: z**n - 1)
+  assert(function_key(make(3)) == function_key(make(3)) != function_key(make(5)))
+  key = function_key(power_minus_one)
+  monkeypatch.setattr(sys.modules[__name__], "POWER", 5)
+  assert(function_key(power_minus_one) != key)
+  assert(function_key(lambda z: z * np.arange(3)) != function_key(lambda z: z * np.arange(4)))
@@ -1,5 +1,6 @@
 import pytest
 from autodiff.node import *
+from autodiff.settings import *
 
 # Test node overloading unary ops.
 def test_unary_node():
@@ -65,4 +66,113 @@ def test_binary_node():
     assert (isinstance(a * 2, Multiplication))
     assert (isinstance(a / b, Division))
     assert (isinstance(a / 2, Division))
-    assert (isinstance(2 / b, Division))
\ No newline at end of file
+    assert (isinstance(2 / b, Division))
+
+# Shared subexpressions are evaluated once per compute.
+def test_shared_subexpressions():
+    settings.set_mode("forward")
+    x = Variable("x")
+    y = x
+    for i in range(40):
+        y = y + y
+    assert (y(x = 1).value() == 2**40)
+    assert (y.derivative()["x"] == 2**40)
+    assert (y(x = 2).value() == 2**41)
+
+def test_memoized_values_refresh():
+    settings.set_mode("forward")
+    x = Variable("x")
+    y = x * x
+    assert (y(x = 3).value() == 9)
+    x.set_value(4)
+    assert (y.eval() == 16)
+
+# Reverse mode visits each node and edge once.
+def test_reverse_shared_subexpressions():
+    settings.set_mode("reverse")
+    x = Variable("x")
+    y = x
+    for i in range(40):
+        y = y + y
+    assert (y(x = 1).value() == 2**40)
+    assert (y.derivative()["x"] == 2**40)
+    z = x * x * x
+    assert (z(x = 2).derivative()["x"] == 12)
+    settings.set_mode("forward")
+
+def test_deep_graph():
+    x = Variable("x")
+    y = x
+    for i in range(20000):
+        y = y * 1.00001 + 0.5
+    for mode in ["forward", "reverse"]:
+        settings.set_mode(mode)
+        y(x = 1)
+        assert (round(y.derivative()["x"], 4) == round(1.00001**20000, 4))
+    settings.set_mode("forward")
+
+def test_compact_nodes():
+    x = Variable("x")
+    y = Variable("y")
+    z = -(x * 2) + x
+    assert (not hasattr(z, "__dict__"))
+    assert (not hasattr(Constant(2), "__dict__"))
+    assert (z.type == "Addition" and Addition.type == "Addition")
+    # Nodes adding no new variables share their child's dict
+    assert (z._variables is z.children[0]._variables)
+    w = z * y
+    assert (set(w._variables) == {"x", "y"})
+    assert (set(z._variables) == {"x"})
+    assert (Constant(1)._variables == {})
+
+def test_interning():
+    x = Variable("x")
+    y = Variable("y")
+    assert (x * y is not x * y)
+    settings.set_interning(True)
+    try:
+        a = x * y
+        assert (a is x * y)
+        assert (a is not y * x)
+        z = (x * y + x) / (x * y + x)
+        assert (z.children[0] is z.children[1])
+        assert (len(z.compile()) == 5)
+        z(x = 2, y = 3)
+        assert (z.value() == 1 and z.derivative()["x"] == 0)
+    finally:
+        settings.set_interning(False)
+    assert (x * y is not a)
+
+def test_constant_folding():
+    x = Variable("x")
+    y = x * (Constant(2) * 3 + 1) - Constant(4) / 2
+    assert (len(y.compile()) == 5)
+    assert (y.children[1].type == "Constant" and y.children[1].value() == 2)
+    y(x = 1)
+    assert (y.value() == 5 and y.derivative()["x"] == 7)
+    assert (isinstance(Constant(np.array([1, 2])) * 2, Constant))
+
+def test_constant_interning():
+    x = Variable("x")
+    assert ((x * 2).children[1] is (x + 2).children[1])
+    assert ((x * 2).children[1] is not (x * 2.0).children[1])
+    const = Node.make_constant(5)
+    const.set_value(6)
+    assert (Node.make_constant(5).value() == 5)
+
+def test_power_specializations():
+    x = Variable("x")
+    assert (type(x**2) is Square and type(x**3) is PowConstExp)
+    assert (type(x**Constant(0.5)) is PowConstExp)
+    assert (type(2**x) is PowConstBase and type(Constant(2)**x) is PowConstBase)
+    assert (type(x**x) is Power and isinstance(x**2, Power))
+    # Negative bases give no NaN in either mode
+    for mode in ["forward", "reverse"]:
+        settings.set_mode(mode)
+        for f, df in [(x**2, -4), (x**3, 12), (2**x, 0.25 * np.log(2)), (x**x, 0.25)]:
+            f(x = -2.0)
+            assert (np.isclose(f.derivative()["x"], df))
+        f = x**x
+        f(x = 2.0)
+        assert (np.isclose(f.derivative()["x"], 4 * (np.log(2) + 1)))
+    settings.set_mode("forward")
@@ -491,3 +491,55 @@ def test_reverse_binary_result():
     assert(powerGH(g = 3, h = 2).value() == 9)
     assert(powerGH.derivative()["g"] == 6)
     assert(round(powerGH.derivative()["h"], 2) == 9.89)
+
+# Scalar and vector variables mixed in one function
+def test_mixed_vector_result():
+    settings.set_mode("forward")
+    test_arr = np.array([0.5, 1.5, 2])
+    a = Variable("a")
+    b = Variable("b")
+    f = exp(a) * b + b**2
+    f(a = test_arr, b = 3)
+    assert (np.allclose(f.value(), 3*np.exp(test_arr) + 9))
+    assert (np.allclose(f.derivative()["a"], 3*np.exp(test_arr)))
+    assert (np.allclose(f.derivative()["b"], np.exp(test_arr) + 6))
+
+def test_simplify():
+    settings.set_mode("forward")
+    x = Variable("x")
+    y = Variable("y")
+    assert (((x * 1 + 0) ** 1 / 1 - 0).simplify() is x)
+    assert ((-(-x)).simplify() is x)
+    assert (exp(log(x)).simplify() is x)
+    assert (log(exp(x)).simplify() is x)
+    assert (isinstance((x * 0).simplify(), Constant))
+    assert ((x * 0 + y).simplify() is y)
+    assert (isinstance(log(x).simplify(), NaturalLog))
+    assert (isinstance(log(x, 10).simplify(), Log))
+    f = sin(x * 1) * log(y + 0) - (0 - x)
+    g = f.simplify()
+    assert (len(g.compile()) < len(f.compile()))
+    for mode in ["forward", "reverse"]:
+        settings.set_mode(mode)
+        f(x = 0.5, y = 2.0)
+        g(x = 0.5, y = 2.0)
+        assert (np.isclose(g.value(), f.value()))
+        for key in ["x", "y"]:
+            assert (np.isclose(g.derivative()[key], f.derivative()[key]))
+    settings.set_mode("forward")
+
+def test_fused_kernels():
+    assert (Exp().fused(1.0) == (np.e, np.e))
+    value, derivative = Tanh().fused(0.5)
+    assert (np.isclose(derivative, 1 / np.cosh(0.5)**2))
+    x = Variable("x")
+    test_arr = np.array([-1.0, 0.2, 3.0])
+    s = 1 / (1 + np.exp(-test_arr))
+    for mode in ["forward", "reverse"]:
+        settings.set_mode(mode)
+        for f, df in [(logistic(x), s * (1 - s)), (sqrt(x**2), np.sign(test_arr)),
+                      (tan(x), 1 / np.cos(test_arr)**2), (exp(x) * tanh(x), np.exp(test_arr) * (np.tanh(test_arr) + 1 / np.cosh(test_arr)**2))]:
+            f(x = test_arr)
+            assert (np.allclose(f.derivative()["x"], df))
+            assert (np.allclose(f.compile()(x = test_arr).derivative()["x"], df))
+    settings.set_mode("forward")
@@ -0,0 +1,63 @@
+import pytest
+import numpy as np
+from autodiff.node import *
+from autodiff.operators import *
+from autodiff.settings import *
+from autodiff.profiling import *
+
+def test_profile_counts():
+    x = Variable("x")
+    y = Variable("y")
+    f = sin(x * y) + exp(x) * x
+    settings.set_mode("forward")
+    with profile() as result:
+        f.compute(x=0.5, y=2.0)
+    totals = result.by_type()
+    # Each node runs once per sweep, memoized calls are not counted
+    assert (totals[("Multiplication", "eval")].calls == 2)
+    assert (totals[("Sine", "diff")].calls == 1)
+    assert (totals[("Addition", "eval")].bytes == 8)
+    assert (len(result.nodes) == 5)
+    assert (result.node_record(f).calls == 2)
+    assert (result.node_record(f, ("eval",)).seconds > 0)
+    assert (np.isclose(f.derivative()["x"], 2 * np.cos(1) + 1.5 * np.exp(0.5)))
+
+def test_profile_reverse():
+    x = Variable("x")
+    f = sqrt(x * np.ones(4)) * x
+    settings.set_mode("reverse")
+    with profile() as result:
+        f.compute(x=np.arange(1.0, 5.0))
+    settings.set_mode("forward")
+    assert (result.by_type()[("Squared Root", "reverse")].calls == 1)
+    assert (result.by_type()[("Squared Root", "eval")].bytes == 32)
+
+def test_profile_restores():
+    methods = [Addition.eval, Sin.eval, UnaryOperator.diff, Variable.reverse]
+    x = Variable("x")
+    with profile():
+        assert (Addition.eval is not methods[0])
+        with pytest.raises(ProfileError):
+            with profile():
+                pass
+    assert ([Addition.eval, Sin.eval, UnaryOperator.diff, Variable.reverse] == methods)
+    # Profiled methods keep the raw kernels tapes use
+    with profile():
+        assert (Addition.eval.__wrapped__ is methods[0].__wrapped__)
+        assert ((x + 1).run({"x": 1.0}).value() == 2.0)
+
+def test_profile_exports(tmp_path):
+    x = Variable("x")
+    f = cos(x) / x
+    with profile() as result:
+        f.compute(x=1.0)
+    lines = result.table().splitlines()
+    assert (lines[0].split() == ["type", "method", "calls", "seconds", "bytes"])
+    assert (len(lines) == 5)
+    assert ("Cosine[0]" in result.table("node"))
+    with pytest.raises(ValueError):
+        result.table("operator")
+    stacks = [line.rsplit(" ", 1) for line in result.collapsed().splitlines()]
+    assert (all(stack.startswith("compute;") and int(time) >= 0 for stack, time in stacks))
+    result.write_collapsed(tmp_path / "compute.folded")
+    assert ((tmp_path / "compute.folded").read_text() == result.collapsed() + "\n")
@@ -0,0 +1,233 @@
+import pytest
+import numpy as np
+from autodiff.node import *
+from autodiff.operators import *
+from autodiff.settings import *
+from autodiff.tape import *
+
+def composition():
+    a = Variable("a")
+    b = Variable("b")
+    c = Variable("c")
+    d = Variable("d")
+    return cos((-a)**2/c) - 4*sin(b) * log(exp(d) + 1, 10)
+
+def test_topological_order():
+    a = Variable("a")
+    b = a * a
+    c = b + b
+    order = topological_order(c)
+    assert (order[-1] is c)
+    assert (len(order) == 3)
+    ids = [id(node) for node in order]
+    assert (ids.index(id(a)) < ids.index(id(b)) < ids.index(id(c)))
+
+def test_compile_cached():
+    y = composition()
+    tape = y.compile()
+    assert (tape is y.compile())
+    assert (len(tape) == 19)
+    assert (tape.nodes[-1] is y)
+
+def test_tape_forward_result():
+    settings.set_mode("forward")
+    y = composition()
+    tape = y.compile()(a = 2, b = 3, c = -1, d = 4)
+    assert (round(tape.value(), 2) == -1.64)
+    assert (round(tape.derivative()["a"], 2) == 3.03)
+    assert (round(tape.derivative()["b"], 2) == 6.91)
+    assert (round(tape.derivative()["c"], 2) == 3.03)
+    assert (round(tape.derivative()["d"], 2) == -0.24)
+    # Tape keeps its own state, nodes are untouched
+    assert (y.value() is None)
+
+def test_tape_reverse_result():
+    settings.set_mode("reverse")
+    y = composition()
+    tape = y.compile()(a = 2, b = 3, c = -1, d = 4)
+    assert (round(tape.value(), 2) == -1.64)
+    assert (round(tape.derivative()["a"], 2) == 3.03)
+    assert (round(tape.derivative()["b"], 2) == 6.91)
+    assert (round(tape.derivative()["c"], 2) == 3.03)
+    assert (round(tape.derivative()["d"], 2) == -0.24)
+    settings.set_mode("forward")
+
+def test_tape_vector_result():
+    test_arr = np.array([-0.5, 0.5])
+    a = Variable("a")
+    f = sin(a) * 2 + exp(a)
+    for mode in ["forward", "reverse"]:
+        settings.set_mode(mode)
+        tape = f.compile()(a = test_arr)
+        f(a = test_arr)
+        assert (np.allclose(tape.value(), f.value()))
+        assert (np.allclose(tape.derivative()["a"], f.derivative()["a"]))
+        assert (np.allclose(tape.derivative()["a"], 2*np.cos(test_arr) + np.exp(test_arr)))
+    settings.set_mode("forward")
+
+def test_tape_deep_graph():
+    x = Variable("x")
+    y = x
+    for i in range(5000):
+        y = y * 1.0001 + 0.5
+    for mode in ["forward", "reverse"]:
+        settings.set_mode(mode)
+        tape = y.compile()(x = 1)
+        assert (round(tape.derivative()["x"], 4) == round(1.0001**5000, 4))
+    settings.set_mode("forward")
+
+def test_tape_errors():
+    y = composition()
+    tape = y.compile()
+    with pytest.raises(TypeError):
+        tape(a = 2, b = 3, c = -1)
+    with pytest.raises(TypeError):
+        tape(a = "hi", b = 3, c = -1, d = 4)
+    with pytest.raises(TypeError):
+        tape(2, 3, -1, 4)
+
+def test_compile_errors():
+    class Undecorated(Node):
+        def eval(self):
+            return 0
+    a = Variable("a")
+    node = Node.make_node(Undecorated(), a)
+    with pytest.raises(TypeError):
+        node.compile()
+
+def test_tape_jacobian():
+    settings.set_mode("forward")
+    a = Variable("a")
+    b = Variable("b")
+    test_arr = np.linspace(0.1, 1, 1000)
+    f = sin(a) * b
+    tape = f.compile()(a = test_arr, b = 2)
+    jacobian = tape.jacobian()
+    assert (jacobian["a"].shape == (1000, 1000))
+    assert (np.allclose(jacobian["a"], np.diag(2*np.cos(test_arr))))
+    assert (jacobian["b"].shape == (1000,))
+    assert (np.allclose(jacobian["b"], np.sin(test_arr)))
+    assert (np.allclose(tape.derivative()["a"], 2*np.cos(test_arr)))
+    assert (np.allclose(tape.derivative()["b"], np.sin(test_arr)))
+
+def test_compute_batch():
+    x = Variable("x")
+    y = Variable("y")
+    f = x**2 * sin(y) + 3 / x
+    xs = np.linspace(1, 2, 500)
+    ys = np.linspace(-1, 1, 500)
+    values, derivative = f.compute_batch({"x": xs, "y": ys})
+    assert (values.shape == (500,))
+    assert (np.allclose(values, xs**2 * np.sin(ys) + 3 / xs))
+    assert (np.allclose(derivative["x"], 2*xs*np.sin(ys) - 3 / xs**2))
+    assert (np.allclose(derivative["y"], xs**2 * np.cos(ys)))
+    # Matches point by point evaluation
+    settings.set_mode("forward")
+    f(x = xs[7], y = ys[7])
+    assert (np.isclose(values[7], f.value()))
+    assert (np.isclose(derivative["x"][7], f.derivative()["x"]))
+
+def test_compute_batch_vector():
+    a = Variable("a")
+    b = Variable("b")
+    f = exp(a) * b
+    points = np.arange(12, dtype=float).reshape(4, 3) / 10
+    scales = np.array([1., 2., 3., 4.])
+    values, derivative = f.compute_batch({"a": points, "b": scales})
+    assert (values.shape == (4, 3))
+    assert (np.allclose(values, np.exp(points) * scales[:, None]))
+    assert (derivative["a"].shape == (4, 3))
+    assert (np.allclose(derivative["a"], np.exp(points) * scales[:, None]))
+    assert (np.allclose(derivative["b"], np.exp(points)))
+
+def test_compute_batch_constants():
+    x = Variable("x")
+    f = x * np.array([1., 2., 3.]) + x**2
+    for xs in [np.array([1., 2., 3.]), np.array([1., 2.])]:
+        values, derivative = f.compute_batch({"x": xs})
+        assert (values.shape == (len(xs), 3))
+        for idx, point in enumerate(xs):
+            f(x = point)
+            assert (np.allclose(values[idx], f.value()))
+            assert (np.allclose(derivative["x"][idx], f.derivative()["x"]))
+
+def test_compute_batch_errors():
+    x = Variable("x")
+    y = Variable("y")
+    f = x / y
+    with pytest.raises(TypeError):
+        f.compute_batch({"x": np.ones(3)})
+    with pytest.raises(TypeError):
+        f.compute_batch({"x": 1, "y": 2})
+    with pytest.raises(ValueError):
+        f.compute_batch({"x": np.ones(3), "y": np.ones(4)})
+    with pytest.raises(ValueError):
+        f.compute_batch({"x": np.ones(0), "y": np.ones(0)})
+    with pytest.raises(ZeroDivisionError):
+        f.compute_batch({"x": np.ones(3), "y": np.array([1., 0., 2.])})
+
+def test_to_function():
+    settings.set_mode("reverse")
+    y = composition()
+    function = y.to_function()
+    assert (function is y.to_function())
+    assert ("def function" in function.source)
+    value, derivative = function(a = 2, b = 3, c = -1, d = 4)
+    y(a = 2, b = 3, c = -1, d = 4)
+    assert (value == y.value())
+    for key in "abcd":
+        assert (np.isclose(derivative[key], y.derivative()[key]))
+    x = Variable("x")
+    f = x**2 * tan(x) + logistic(x) / sqrt(x) + 2**x - arcsin(x / 2)
+    test_arr = np.array([0.3, 0.7, 1.1])
+    value, derivative = f.to_function()({"x": test_arr})
+    f(x = test_arr)
+    assert (np.allclose(value, f.value()))
+    assert (np.allclose(derivative["x"], f.derivative()["x"]))
+    assert (x.to_function()(x = 3) == (3, {"x": 1}))
+    settings.set_mode("forward")
+
+def test_to_function_errors():
+    y = composition()
+    with pytest.raises(TypeError):
+        y.to_function()(a = 2)
+    with pytest.raises(TypeError):
+        y.to_function()({"a": 2}, b = 3)
+    with pytest.raises(ZeroDivisionError):
+        y.to_function()(a = 2, b = 3, c = 0, d = 4)
+    with pytest.raises(TypeError):
+        Tape([y, y * 2]).to_function()
+
+def test_run_concurrent():
+    from concurrent.futures import ThreadPoolExecutor
+    settings.set_mode("forward")
+    y = composition()
+    tape = y.compile()
+    points = [{"a": a, "b": 3, "c": -1, "d": np.linspace(0, 1, 500)} for a in np.linspace(1, 2, 16)]
+    modes = ["forward", "reverse"] * 8
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(tape.run, points, modes))
+    assert (tape.value() is None)
+    for point, mode, result in zip(points, modes, results):
+        assert (result.mode == mode)
+        expected = y.run(point, "forward")
+        assert (np.allclose(result.value(), expected.value()))
+        for key in "abcd":
+            assert (np.allclose(result.derivative()[key], expected.derivative()[key]))
+    assert (results[0].jacobian() is not None and results[1].jacobian() is None)
+    with pytest.raises(ValueError):
+        tape.run(points[0], "sideways")
+
+def test_use_mode():
+    from concurrent.futures import ThreadPoolExecutor
+    settings.set_mode("forward")
+    with settings.use_mode("reverse"):
+        assert (settings.current_mode() == "reverse")
+        with ThreadPoolExecutor(1) as pool:
+            assert (pool.submit(settings.current_mode).result() == "forward")
+        y = composition()
+        assert (y.compile()(a = 2, b = 3, c = -1, d = 4).jacobian() is None)
+    assert (settings.current_mode() == "forward")
+    with pytest.raises(ValueError):
+        with settings.use_mode("sideways"):
+            pass
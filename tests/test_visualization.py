@@ -3,6 +3,7 @@ import numpy as np
 from autodiff.node import *
 from autodiff.operators import *
 from autodiff.visualization import *
+from autodiff.profiling import *
 
 def test_composition_result():
     a = Variable("a")
@@ -16,4 +17,27 @@ def test_composition_result():
     assert(len(graph.added_edges) == 18)
 
     table = y.get_comp_table()
-    assert(table.shape == (19,7))
\ No newline at end of file
+    assert(table.shape == (19,7))
+
+def test_heatmap():
+    a = Variable("a")
+    b = Variable("b")
+    y = sin(a * b) + exp(a) * np.ones(20)
+    with profile() as result:
+        y.compute(a=np.ones(20), b=np.ones(20))
+
+    graph = create_computational_graph(y, "memory", result)
+    assert(len(graph.added_nodes) == 8)
+    assert(graph.costs[CompGraph.get_id(a)] == 0)
+    assert(graph.get_heat(y) == ("9", "%d B" % graph.highest))
+    assert("colorscheme=ylorrd9" in graph.source)
+
+    graph = y.get_comp_graph("time", result)
+    assert(graph.costs[CompGraph.get_id(y)] == result.node_record(y).seconds)
+    assert("us\"" in graph.source)
+
+    with pytest.raises(ValueError):
+        create_computational_graph(y, "calls", result)
+    with pytest.raises(ValueError):
+        create_computational_graph(y, "time")
+    assert("fillcolor" not in create_computational_graph(y).source)